@@ -3,15 +3,66 @@ import json
 import csv
 import re
 import datetime
+import time
 import collections
+import functools
 import markdown
+import json_backend
 from typing import List, Set, Dict, Any, Optional, Tuple
 from flask import Flask, render_template, g, current_app, abort, request, jsonify
 from data_processor import DataProcessor
-from lineage_view import LineageView
+from lineage_view import DEFAULT_REACHABILITY_MAX_BYTES, LineageView
 from model_processor import ModelProcessor
+from processor_cache import CacheView, ProcessorCache, StaleDataError
+from data_watcher import DataWatcher
+from http_cache import compute_etag, encoded_etag, is_not_modified, last_modified_from
+from page_cache import PageCache
+from compression import ResponseCompressor
+from snapshot import restore_snapshot
+from cli import register_commands
 from config import get_config
 
+
+def build_data_processor(path: str, streaming: bool = False, workers: int = 0) -> DataProcessor:
+    # With nothing to fall back to, an unreadable report is served as an empty one
+    dp = DataProcessor(path, streaming=streaming, workers=workers)
+    dp.process_json()
+    return dp
+
+
+def update_data_processor(dp: DataProcessor, path: str, streaming: bool = False, workers: int = 0) -> DataProcessor:
+    updated = build_data_processor(path, streaming=streaming, workers=workers)
+    if updated.load_error:
+        # Let the cache keep serving the previous version of the report
+        raise ValueError(updated.load_error)
+    return updated
+
+
+def build_lineage_view_processor(path: str,
+                                 reachability_max_bytes: int = DEFAULT_REACHABILITY_MAX_BYTES) -> LineageView:
+    lvp = LineageView(path, reachability_max_bytes)
+    lvp.process_lineage_data()
+    # Find dependency cycles and levels at ingest; the analyses share them
+    lvp.measure_graph().condensation()
+    # Start laying out the diagram in the background, so it is usually ready
+    # by the time /lineage-view is opened
+    lvp.layout(timeout=0)
+    return lvp
+
+
+def update_lineage_view_processor(lvp: LineageView, path: str) -> LineageView:
+    refreshed = lvp.refreshed()
+    refreshed.measure_graph().condensation()
+    refreshed.layout(timeout=0)
+    return refreshed
+
+
+def build_model_processor(path: str) -> ModelProcessor:
+    mp = ModelProcessor(path)
+    mp.load()
+    return mp
+
+
 def create_app(config_object=None) -> Flask:
     """
     Application factory for creating the Flask app.
@@ -34,61 +85,228 @@ def create_app(config_object=None) -> Flask:
         response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
         return response
 
+    # Data files each endpoint's output depends on. Every HTML page shows the
+    # report name, so they all depend on report.json.
+    conditional_endpoints = {
+        'index': ('report', 'lineage', 'model'),
+        'table_view': ('report', 'lineage', 'model'),
+        'lineage_view_route': ('report', 'lineage'),
+        'dax_expressions': ('report', 'lineage'),
+        'model_insights': ('report', 'lineage', 'model'),
+        'report_insights': ('report', 'lineage', 'model'),
+        'source_explorer': ('report', 'model'),
+        'unused_measures_view': ('report', 'lineage', 'model'),
+        'get_model_json': ('model',),
+        'get_lineage_subgraph': ('lineage',),
+    }
+
+    # Templates are loaded with the app, so no page is older than its start
+    released_ns = time.time_ns()
+
+    compressor = None
+    if app.config.get('COMPRESSION_ENABLED', True):
+        compressor = ResponseCompressor(min_size=app.config.get('COMPRESSION_MIN_SIZE', 1024))
+    app.extensions['response_compressor'] = compressor
+
+    @app.before_request
+    def check_conditional_request():
+        """
+        Answer repeat visits with 304 Not Modified before any page is rendered.
+        The ETag only depends on data file fingerprints and the template version.
+        """
+        sources = conditional_endpoints.get(request.endpoint)
+        if sources is None or request.method not in ('GET', 'HEAD'):
+            return None
+
+        # Take the fingerprints from the view the page is rendered from, so a
+        # background refresh landing mid-request cannot put new content under
+        # the old ETag. Missing files are left for the route to report.
+        view = data_view()
+        fingerprints = [view.fingerprint(name) if processor_cache.effective_fingerprint(name) is not None else None
+                        for name in sources]
+        etag = compute_etag(fingerprints, f"{app.config.get('TEMPLATE_VERSION', '')}|{request.full_path}")
+        last_modified = last_modified_from(fingerprints, released_ns)
+        g.conditional_etag = etag
+        g.conditional_last_modified = last_modified
+
+        if is_not_modified(request, etag, last_modified, compressor.encodings if compressor else ()):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return None
+
+    # after_request hooks run in reverse registration order, so this runs after
+    # add_conditional_headers below has set the uncompressed ETag.
+    @app.after_request
+    def compress_response(response):
+        """
+        Compress large text responses for clients that accept it. Pages served
+        by the page cache keep their compressed bytes next to the HTML, so each
+        data version is compressed once per encoding.
+        """
+        if compressor is None or request.method == 'HEAD':
+            return response
+        response.vary.add('Accept-Encoding')
+        if not compressor.should_compress(response):
+            return response
+        encoding = compressor.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        cached = g.get('page_cache_entry')
+        data = cached[0].variants.get(encoding) if cached is not None else None
+        from_cache = data is not None
+        if data is None:
+            data = compressor.compress(body, encoding)
+            if cached is not None:
+                entry, key = cached
+                page_cache.add_variant(key, entry.version, encoding, data)
+        if len(data) >= len(body):
+            return response
+
+        compressor.record(len(body), len(data), from_cache)
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        etag, is_weak = response.get_etag()
+        if etag is not None:
+            response.set_etag(encoded_etag(etag, encoding), weak=is_weak)
+        return response
+
+    @app.after_request
+    def add_conditional_headers(response):
+        etag = g.get('conditional_etag')
+        if etag is not None and response.status_code == 200:
+            response.set_etag(etag)
+            if g.conditional_last_modified is not None:
+                response.last_modified = g.conditional_last_modified
+            # Let browsers and proxies store the page but revalidate every time
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    page_cache_bytes = app.config.get('PAGE_CACHE_MAX_BYTES', 0)
+    page_cache = PageCache(page_cache_bytes) if app.config.get('PAGE_CACHE_ENABLED') and page_cache_bytes else None
+    app.extensions['page_cache'] = page_cache
+
+    def cached_page(view):
+        """
+        Serve the rendered output of ``view`` from the page cache while the
+        page's ETag (data fingerprints + template version + query) is unchanged.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = g.get('conditional_etag')
+            if page_cache is None or version is None:
+                return view(*args, **kwargs)
+
+            key = (request.endpoint, request.full_path)
+            entry = page_cache.get(key, version)
+            if entry is not None:
+                g.page_cache_entry = (entry, key)
+                return app.response_class(entry.body, mimetype=entry.mimetype)
+
+            rv = view(*args, **kwargs)
+            if isinstance(rv, str):
+                entry = page_cache.put(key, version, rv.encode('utf-8'), 'text/html')
+                if entry is not None:
+                    g.page_cache_entry = (entry, key)
+            return rv
+        return wrapper
+
     # No need to set default paths - they are already in the config file
 
-    @app.teardown_appcontext
-    def teardown(exception: Optional[BaseException] = None) -> None:
-        """Clean up resources stored in g."""
-        g.pop('data_processor', None)
-        g.pop('lineage_view_processor', None)
-        g.pop('model_processor', None)
+    try:
+        backend = json_backend.set_backend(app.config.get('JSON_BACKEND', 'auto'))
+    except ValueError as e:
+        app.logger.warning(f"{e}; falling back to the fastest installed JSON backend")
+        backend = json_backend.set_backend('auto')
+    app.logger.info(f"Decoding JSON with {backend.name}")
+
+    # Parsed processors are shared across requests and rebuilt only when the
+    # underlying data file changes.
+    watch_data = app.config.get('DATA_WATCHER_ENABLED', False)
+    processor_cache = ProcessorCache(
+        hash_content=app.config.get('PROCESSOR_CACHE_HASH_CONTENT', False),
+        logger=app.logger,
+        serve_stale=watch_data
+    )
+    report_options = {
+        'streaming': app.config.get('REPORT_STREAMING', False),
+        'workers': app.config.get('REPORT_WORKERS', 0),
+    }
+    processor_cache.register('report', app.config['REPORT_JSON_PATH'],
+                             functools.partial(build_data_processor, **report_options),
+                             updater=functools.partial(update_data_processor, **report_options))
+    reachability_max_bytes = app.config.get('LINEAGE_INDEX_MAX_BYTES', DEFAULT_REACHABILITY_MAX_BYTES)
+    processor_cache.register('lineage', app.config['MEASURE_DEPENDENCIES_TSV_PATH'], functools.partial(
+        build_lineage_view_processor, reachability_max_bytes=reachability_max_bytes),
+        updater=update_lineage_view_processor)
+    processor_cache.register('model', app.config['MODEL_JSON_PATH'], build_model_processor)
+    app.extensions['processor_cache'] = processor_cache
+
+    # Warm the cache from the precomputed snapshot (see `flask precompute`)
+    if app.config.get('SNAPSHOT_ENABLED', True):
+        restored = restore_snapshot(processor_cache, app.config['SNAPSHOT_PATH'], {
+            'report': DataProcessor.from_snapshot,
+            'lineage': functools.partial(LineageView.from_snapshot, reachability_max_bytes=reachability_max_bytes),
+            'model': ModelProcessor.from_snapshot,
+        }, logger=app.logger)
+        if any(restored.values()):
+            app.logger.info(f"Restored from snapshot: {', '.join(name for name, ok in restored.items() if ok)}")
+
+    # With the watcher on, requests never rebuild: changed files are re-parsed
+    # in the background and swapped in once ready.
+    if watch_data:
+        watcher = DataWatcher(processor_cache, interval=app.config.get('DATA_WATCHER_INTERVAL', 2.0),
+                              logger=app.logger)
+        watcher.start()
+        app.extensions['data_watcher'] = watcher
+
+    register_commands(app)
+
+    def data_view() -> CacheView:
+        """
+        Pin the data versions used by the current request, so a background
+        reload never mixes old and new data within one page.
+        """
+        if 'data_view' not in g:
+            g.data_view = processor_cache.view()
+        return g.data_view
 
     def get_data_processor() -> DataProcessor:
         """
-        Retrieve or create the DataProcessor instance for this request.
+        Retrieve the shared DataProcessor instance for the current report file.
         """
-        if not hasattr(g, 'data_processor'):
-            # Check if required file exists
-            if not os.path.exists(app.config['REPORT_JSON_PATH']):
-                current_app.logger.error(f"Report JSON file not found: {app.config['REPORT_JSON_PATH']}")
-                abort(500, description="Report data file not found. Please check your data directory.")
-            
-            dp = DataProcessor(app.config['REPORT_JSON_PATH'])
-            dp.process_json()
-            g.data_processor = dp
-        return g.data_processor
+        # Check if required file exists
+        if not os.path.exists(app.config['REPORT_JSON_PATH']):
+            current_app.logger.error(f"Report JSON file not found: {app.config['REPORT_JSON_PATH']}")
+            abort(500, description="Report data file not found. Please check your data directory.")
+        return data_view().get('report')
 
     def get_lineage_view_processor() -> LineageView:
         """
-        Retrieve or create the LineageView instance for this request.
+        Retrieve the shared LineageView instance for the current dependency file.
         """
-        if not hasattr(g, 'lineage_view_processor'):
-            lvp = LineageView(app.config['MEASURE_DEPENDENCIES_TSV_PATH'])
-            lvp.process_lineage_data()
-            g.lineage_view_processor = lvp
-        return g.lineage_view_processor
+        return data_view().get('lineage')
 
     def get_model_processor() -> ModelProcessor:
         """
-        Retrieve or create the ModelProcessor instance for this request.
+        Retrieve the shared ModelProcessor instance for the current model file.
         """
-        if not hasattr(g, 'model_processor'):
-            if not os.path.exists(app.config['MODEL_JSON_PATH']):
-                current_app.logger.error(f"Model JSON file not found: {app.config['MODEL_JSON_PATH']}")
-                abort(500, description="Model data file not found. Please check your data directory.")
-            mp = ModelProcessor(app.config['MODEL_JSON_PATH'])
-            mp.load()
-            g.model_processor = mp
-        return g.model_processor
+        if not os.path.exists(app.config['MODEL_JSON_PATH']):
+            current_app.logger.error(f"Model JSON file not found: {app.config['MODEL_JSON_PATH']}")
+            abort(500, description="Model data file not found. Please check your data directory.")
+        return data_view().get('model')
 
     def load_model_data(model_json_path: str) -> Dict[str, Any]:
         """
         Load model data from a JSON file.
         """
         try:
-            with open(model_json_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            return data
+            return json_backend.load_file(model_json_path)
         except (json.JSONDecodeError, IOError) as e:
             current_app.logger.error(f"Error reading or parsing the model JSON file: {e}")
             abort(500, description="Error loading model data.")
@@ -126,63 +344,46 @@ def create_app(config_object=None) -> Flask:
 
         return m_queries_info
 
-    def get_report_metrics() -> Dict[str, Any]:
-        """
-        Get metrics about the report for the dashboard.
-        """
-        dp = get_data_processor()
-        lvp = get_lineage_view_processor()
-        mp = get_model_processor()
-
+    # Derived results are computed once per data version and shared by all
+    # routes. Each one only depends on the files it actually reads, so e.g. a
+    # model.json change leaves the unused-measure analysis untouched.
+    def build_visual_summary(dp: DataProcessor) -> Dict[str, Any]:
         excluded_types = {"Page Level Filters", "Global Level Filters"}
-        valid_visuals = [
-            row for row in dp.visuals_data
-            if len(row) > 3 and row[3] and row[1] and row[1] not in excluded_types
+        visual_types = [
+            record.visual_type for record in dp.visual_records
+            if record.fields and record.visual_type and record.visual_type not in excluded_types
         ]
-
-        visual_types = [row[1] for row in valid_visuals]
-        visual_count = len(visual_types)
         counter = collections.Counter(visual_types)
-        most_common_visual = counter.most_common(1)[0][0] if counter else "None"
-        visual_distribution = counter.most_common(5)
+        unique_pages = {record.page for record in dp.visual_records if record.page}
 
-        unique_pages = {row[0] for row in dp.visuals_data if row and row[0]}
+        return {
+            'visual_count': len(visual_types),
+            'page_count': len(unique_pages),
+            'most_common_visual': counter.most_common(1)[0][0] if counter else "None",
+            'visual_distribution': counter.most_common(5)
+        }
 
-        all_measures = lvp.get_all_measures()
+    def build_used_measures(dp: DataProcessor, lvp: LineageView, all_measures: Set[str]) -> Set[str]:
         used_measures = dp.get_used_measures(all_measures)
-        used_measures = lvp.expand_used_measures(used_measures)
-        final_measures = lvp.get_final_measures()
-        unused_analysis = lvp.get_comprehensive_unused_measures(used_measures)
-        unused_final_measures = final_measures - used_measures
-
-        tables = mp.get_tables()
-        relationships = mp.get_relationships()
-        roles = mp.get_roles()
-        annotations = mp.get_annotations()
-        measures_detail = mp.get_measures() or []
+        return lvp.expand_used_measures(used_measures)
 
-        column_count = sum(len(table.get('columns', [])) for table in tables)
-        hidden_measure_count = sum(1 for measure in measures_detail if measure.get('isHidden'))
-        hidden_table_count = sum(1 for table in tables if table.get('isHidden'))
-        hidden_column_count = sum(
-            1
-            for table in tables
-            for column in table.get('columns', [])
-            if column.get('isHidden')
-        )
+    def build_model_summary(mp: ModelProcessor, all_measures: Set[str]) -> Dict[str, Any]:
+        # Counts come from the model index, so no table has to be materialized
+        stats = mp.get_statistics()
 
-        model_summary = {
-            'table_count': len(tables),
-            'column_count': column_count,
-            'measure_count': len(measures_detail) if measures_detail else len(all_measures),
-            'relationship_count': len(relationships),
-            'role_count': len(roles),
-            'hidden_table_count': hidden_table_count,
-            'hidden_column_count': hidden_column_count,
-            'hidden_measure_count': hidden_measure_count,
-            'annotation_count': len(annotations),
+        return {
+            'table_count': stats['table_count'],
+            'column_count': stats['column_count'],
+            'measure_count': stats['measure_count'] or len(all_measures),
+            'relationship_count': len(mp.get_relationships()),
+            'role_count': len(mp.get_roles()),
+            'hidden_table_count': stats['hidden_table_count'],
+            'hidden_column_count': stats['hidden_column_count'],
+            'hidden_measure_count': stats['hidden_measure_count'],
+            'annotation_count': len(mp.get_annotations()),
         }
 
+    def build_report_summary(dp: DataProcessor) -> Dict[str, Any]:
         theme_info = dp.get_theme_info() or {}
         bookmarks = dp.get_bookmarks()
         navigation_items = dp.get_navigation_items()
@@ -208,7 +409,7 @@ def create_app(config_object=None) -> Flask:
 
         navigation_counts = collections.Counter((item.get('visual_type') or 'Other') for item in navigation_items)
 
-        report_summary = {
+        return {
             'theme_name': theme_info.get('customTheme', {}).get('name')
             or theme_info.get('baseTheme', {}).get('name')
             or 'Power BI Default',
@@ -225,46 +426,85 @@ def create_app(config_object=None) -> Flask:
             'drop_shadows': drop_shadows,
         }
 
+    def build_report_metrics(visual_summary: Dict[str, Any], all_measures: Set[str], final_measures: Set[str],
+                             used_measures: Set[str], unused_analysis: Dict[str, Any],
+                             model_summary: Dict[str, Any], report_summary: Dict[str, Any]) -> Dict[str, Any]:
+        unused_final_measures = final_measures - used_measures
+
         return {
-            'visual_count': visual_count,
-            'page_count': len(unique_pages),
+            'visual_count': visual_summary['visual_count'],
+            'page_count': visual_summary['page_count'],
             'measure_count': len(all_measures),
             'unused_count': unused_analysis.get('total_unused', len(unused_final_measures)),
             'unused_breakdown': {
                 'immediate': unused_analysis.get('immediate_unused', len(unused_final_measures)),
                 'cascade': unused_analysis.get('cascade_unused', 0)
             },
-            'most_common_visual': most_common_visual,
-            'visual_distribution': visual_distribution,
+            'most_common_visual': visual_summary['most_common_visual'],
+            'visual_distribution': visual_summary['visual_distribution'],
             'model_summary': model_summary,
             'report_summary': report_summary
         }
 
-    def calculate_lineage_metrics(lineage_view_processor: LineageView) -> Dict[str, int]:
-        """
-        Calculate metrics for the lineage view page.
-        
-        Returns:
-            Dict with parent_measures_count, final_measures_count, and columns_count
-        """
-        # Use existing methods to get measures
-        all_measures = lineage_view_processor.get_all_measures()
-        final_measures = lineage_view_processor.get_final_measures()
-        
+    def build_lineage_cycles(lvp: LineageView) -> List[List[str]]:
+        cycles = lvp.get_cycles()
+        for cycle in cycles:
+            app.logger.warning(f"Circular measure dependency: {' -> '.join(cycle)}")
+        return cycles
+
+    def build_lineage_metrics(lineage_view_processor: LineageView, all_measures: Set[str],
+                              final_measures: Set[str], lineage_cycles: List[List[str]]) -> Dict[str, int]:
         # Count columns from nodes
         columns_count = sum(1 for node in lineage_view_processor.nodes if node.get('type') == 'column')
-        
+
         # Parent measures are those that have children (total - final)
         parent_measures_count = len(all_measures) - len(final_measures)
-        
+
         return {
             'parent_measures_count': parent_measures_count,
             'final_measures_count': len(final_measures),
             'columns_count': columns_count,
             'total_measures': len(all_measures),
-            'total_relationships': len(lineage_view_processor.edges)
+            'total_relationships': len(lineage_view_processor.edges),
+            'circular_dependencies': len(lineage_cycles)
         }
 
+    processor_cache.register_derived('all_measures', ['lineage'], lambda lvp: lvp.get_all_measures())
+    processor_cache.register_derived('final_measures', ['lineage'], lambda lvp: lvp.get_final_measures())
+    processor_cache.register_derived('used_measures', ['report', 'lineage', 'all_measures'], build_used_measures)
+    processor_cache.register_derived(
+        'unused_analysis', ['lineage', 'used_measures'],
+        lambda lvp, used_measures: lvp.get_comprehensive_unused_measures(used_measures))
+    processor_cache.register_derived('visual_summary', ['report'], build_visual_summary)
+    processor_cache.register_derived('model_summary', ['model', 'all_measures'], build_model_summary)
+    processor_cache.register_derived('report_summary', ['report'], build_report_summary)
+    processor_cache.register_derived(
+        'report_metrics',
+        ['visual_summary', 'all_measures', 'final_measures', 'used_measures', 'unused_analysis',
+         'model_summary', 'report_summary'],
+        build_report_metrics)
+    processor_cache.register_derived('lineage_cycles', ['lineage'], build_lineage_cycles)
+    processor_cache.register_derived(
+        'lineage_metrics', ['lineage', 'all_measures', 'final_measures', 'lineage_cycles'], build_lineage_metrics)
+
+    def get_report_metrics() -> Dict[str, Any]:
+        """
+        Get metrics about the report for the dashboard.
+        """
+        # Surface missing data files as a friendly error before computing anything
+        get_data_processor()
+        get_model_processor()
+        return data_view().get_derived('report_metrics')
+
+    def calculate_lineage_metrics() -> Dict[str, int]:
+        """
+        Calculate metrics for the lineage view page.
+        
+        Returns:
+            Dict with parent_measures_count, final_measures_count, and columns_count
+        """
+        return data_view().get_derived('lineage_metrics')
+
     @app.context_processor
     def inject_common_data():
         """Inject common data into templates."""
@@ -277,18 +517,25 @@ def create_app(config_object=None) -> Flask:
         }
 
     def get_report_name():
-        """Extract the report name from the report file."""
+        """
+        Return the report name captured when report.json was ingested.
+
+        The name comes from the cached DataProcessor, so rendering a page never
+        parses report.json a second time.
+        """
         report_path = app.config['REPORT_JSON_PATH']
         report_name = os.path.basename(report_path).replace(".json", "")
 
+        if not os.path.exists(report_path):
+            return report_name
+
         try:
-            with open(report_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                if 'name' in data:
-                    report_name = data['name']
-        except:
-            pass
+            dp = data_view().get('report')
+        except Exception:
+            return report_name
 
+        if dp.report_name is not None:
+            report_name = dp.report_name
         return report_name
 
     @app.route('/')
@@ -305,78 +552,38 @@ def create_app(config_object=None) -> Flask:
         )
 
     @app.route('/table-view')
+    @cached_page
     def table_view() -> str:
         dp = get_data_processor()
         mp = get_model_processor()
         metrics = get_report_metrics()
 
-        tables = mp.get_tables()
-        measures_detail = mp.get_measures() or []
-
-        field_metadata_map: Dict[str, Dict[str, Any]] = {}
-        field_metadata_lower: Dict[str, Dict[str, Any]] = {}
-
-        def register_field(key: str, meta: Dict[str, Any]) -> None:
-            if not key:
-                return
-            meta_copy = dict(meta)
-            meta_copy.setdefault('full', key)
-            meta_copy.setdefault('display', meta_copy.get('name', key))
-            field_metadata_map[key] = meta_copy
-            field_metadata_lower[key.lower()] = meta_copy
-
-        for table in tables:
-            table_name = (table.get('name') or '').strip()
-            if not table_name:
-                continue
-
-            for column in table.get('columns', []):
-                column_name = (column.get('name') or '').strip()
-                if not column_name:
-                    continue
-                key = f"{table_name}[{column_name}]"
-                register_field(key, {
+        # Resolved through the model's name index; memoized per request since
+        # the same fields repeat across visuals
+        field_metadata_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        def lookup_field(field_name: str) -> Optional[Dict[str, Any]]:
+            if field_name in field_metadata_cache:
+                return field_metadata_cache[field_name]
+            meta = None
+            found = mp.find_field(field_name)
+            if found:
+                table_name, kind, item = found
+                item_name = (item.get('name') or '').strip()
+                meta = {
                     'table': table_name,
-                    'name': column_name,
-                    'kind': 'column',
-                    'data_type': column.get('dataType'),
-                    'data_category': column.get('dataCategory'),
-                    'format_string': column.get('formatString'),
-                    'description': column.get('description'),
-                    'summarize_by': column.get('summarizeBy')
-                })
-
-            for measure in table.get('measures', []):
-                measure_name = (measure.get('name') or '').strip()
-                if not measure_name:
-                    continue
-                key = f"{table_name}[{measure_name}]"
-                register_field(key, {
-                    'table': table_name,
-                    'name': measure_name,
-                    'kind': 'measure',
-                    'data_type': None,
-                    'data_category': None,
-                    'format_string': measure.get('formatString'),
-                    'description': measure.get('description')
-                })
-
-        for measure in measures_detail:
-            table_name = (measure.get('table') or '').strip()
-            measure_name = (measure.get('name') or '').strip()
-            if not table_name or not measure_name:
-                continue
-            key = f"{table_name}[{measure_name}]"
-            if key not in field_metadata_map:
-                register_field(key, {
-                    'table': table_name,
-                    'name': measure_name,
-                    'kind': 'measure',
-                    'data_type': None,
-                    'data_category': None,
-                    'format_string': measure.get('formatString'),
-                    'description': measure.get('description')
-                })
+                    'name': item_name,
+                    'display': item_name,
+                    'kind': kind,
+                    'data_type': item.get('dataType') if kind == 'column' else None,
+                    'data_category': item.get('dataCategory') if kind == 'column' else None,
+                    'format_string': item.get('formatString'),
+                    'description': item.get('description')
+                }
+                if kind == 'column':
+                    meta['summarize_by'] = item.get('summarizeBy')
+            field_metadata_cache[field_name] = meta
+            return meta
 
         def parse_field_reference(field_name: str) -> Tuple[str, str]:
             if '[' in field_name and field_name.endswith(']'):
@@ -398,9 +605,7 @@ def create_app(config_object=None) -> Flask:
                     'description': None
                 }
 
-            base = field_metadata_map.get(field_name)
-            if not base:
-                base = field_metadata_lower.get(field_name.lower())
+            base = lookup_field(field_name)
 
             table_part, simple_name = parse_field_reference(field_name)
 
@@ -424,13 +629,6 @@ def create_app(config_object=None) -> Flask:
                 'description': None
             }
 
-        def split_fields(raw_value: Any) -> List[str]:
-            if not raw_value:
-                return []
-            if isinstance(raw_value, list):
-                return [str(value).strip() for value in raw_value if str(value).strip()]
-            return [segment.strip() for segment in str(raw_value).split(';') if segment.strip()]
-
         visual_rows: List[Dict[str, Any]] = []
         page_stats: Dict[str, Dict[str, Any]] = {}
         field_usage: Dict[str, Dict[str, Any]] = {}
@@ -488,20 +686,17 @@ def create_app(config_object=None) -> Flask:
                 })
             return items
 
-        for row in dp.visuals_data:
-            if not row or len(row) < 4:
-                continue
-
-            page = (row[0] or 'Unassigned').strip()
-            visual_type = (row[1] or 'Unknown Visual').strip()
-            visual_name = (row[2] or '').strip() or visual_type
-            raw_fields = split_fields(row[3])
-            if not raw_fields:
+        for record in dp.visual_records:
+            if not record.fields:
                 continue
 
-            filter_fields_raw = split_fields(row[4] if len(row) > 4 else '')
-            vc_fields_raw = split_fields(row[5] if len(row) > 5 else '')
-            object_fields_raw = split_fields(row[6] if len(row) > 6 else '')
+            page = (record.page or 'Unassigned').strip()
+            visual_type = (record.visual_type or 'Unknown Visual').strip()
+            visual_name = (record.visual_name or '').strip() or visual_type
+            raw_fields = dp.record_fields(record, 'fields')
+            filter_fields_raw = dp.record_fields(record, 'filter_fields')
+            vc_fields_raw = dp.record_fields(record, 'vc_fields')
+            object_fields_raw = dp.record_fields(record, 'object_fields')
 
             visual_identifier = f"{page}:{visual_name}"
 
@@ -686,24 +881,42 @@ def create_app(config_object=None) -> Flask:
         )
 
     @app.route('/lineage-view')
+    @cached_page
     def lineage_view_route() -> str:
         # Check if the feature is enabled in config
         if not app.config.get('ENABLE_LINEAGE_VIEW', True):
             abort(404, description="This feature is currently disabled.")
 
         lvp = get_lineage_view_processor()
+        # Coordinates come from the server-side layout, so the browser skips physics
+        layout = lvp.layout(timeout=app.config.get('LINEAGE_LAYOUT_WAIT', 1.0))
         
         # Calculate metrics for the lineage view
-        lineage_metrics = calculate_lineage_metrics(lvp)
+        lineage_metrics = calculate_lineage_metrics()
+
+        if layout is None:
+            # Still being laid out: let the browser place the nodes this time,
+            # and keep this page out of the page cache and browser revalidation
+            current_app.logger.info("Lineage layout not ready yet; serving the diagram with a client-side layout")
+            g.conditional_etag = None
+            return app.response_class(render_template(
+                'lineage_view.html',
+                nodes=lvp.nodes,
+                edges=lvp.edges,
+                lineage_metrics=lineage_metrics,
+                server_layout=False
+            ), headers={'Cache-Control': 'no-store'})
         
         return render_template(
             'lineage_view.html',
-            nodes=lvp.nodes,
+            nodes=layout.positioned_nodes(lvp.nodes),
             edges=lvp.edges,
-            lineage_metrics=lineage_metrics
+            lineage_metrics=lineage_metrics,
+            server_layout=True
         )
 
     @app.route('/dax-expressions')
+    @cached_page
     def dax_expressions() -> str:
         # Check if the feature is enabled in config
         if not app.config.get('ENABLE_DAX_EXPLORER', True):
@@ -714,6 +927,7 @@ def create_app(config_object=None) -> Flask:
         return render_template('dax_expressions.html', dax_expressions=dax_expr)
 
     @app.route('/model-insights')
+    @cached_page
     def model_insights() -> str:
         if not app.config.get('ENABLE_MODEL_INSIGHTS', True):
             abort(404, description="This feature is currently disabled.")
@@ -785,6 +999,7 @@ def create_app(config_object=None) -> Flask:
         )
 
     @app.route('/report-insights')
+    @cached_page
     def report_insights() -> str:
         if not app.config.get('ENABLE_REPORT_INSIGHTS', True):
             abort(404, description="This feature is currently disabled.")
@@ -890,6 +1105,7 @@ def create_app(config_object=None) -> Flask:
         )
 
     @app.route('/source-explorer')
+    @cached_page
     def source_explorer() -> str:
         # Check if the feature is enabled in config
         if not app.config.get('ENABLE_SOURCE_EXPLORER', True):
@@ -924,19 +1140,13 @@ def create_app(config_object=None) -> Flask:
 
     
     @app.route('/unused-measures')
+    @cached_page
     def unused_measures_view() -> str:
-        dp = get_data_processor()
-        lvp = get_lineage_view_processor()
-
-        # Get used measures from visuals
-        known_measures = set(lvp.measure_data) or lvp.get_all_measures()
-        used_measures = dp.get_used_measures(known_measures)
-        used_measures = lvp.expand_used_measures(used_measures)
-
-        # Get comprehensive analysis of all unused measures
-        unused_analysis = lvp.get_comprehensive_unused_measures(used_measures)
         metrics = get_report_metrics()
 
+        # Comprehensive analysis of all unused measures, shared with the dashboard metrics
+        unused_analysis = data_view().get_derived('unused_analysis')
+
         # Pass both the simple list for the template and the analysis for future use
         return render_template(
             'unused_measures.html',
@@ -955,6 +1165,63 @@ def create_app(config_object=None) -> Flask:
             current_app.logger.error(f"Error loading model JSON: {e}")
             return jsonify({"error": str(e)}), 500
 
+    @app.route('/api/measure-dax', methods=['GET'])
+    def get_measure_dax():
+        """API endpoint returning one measure's DAX, read from the TSV on demand."""
+        measure_name = request.args.get('name', '')
+        dax_expression = get_lineage_view_processor().get_measure_dax(measure_name)
+        if dax_expression is None:
+            return jsonify({"error": f"Unknown measure: {measure_name}"}), 404
+        return jsonify({"name": measure_name, "dax": dax_expression})
+
+    @app.route('/api/lineage-subgraph', methods=['GET'])
+    def get_lineage_subgraph():
+        """
+        API endpoint returning one page of the dependency neighbourhood of the
+        given measures (?measure=...&depth_up=1&depth_down=1&max_nodes=&limit=&cursor=),
+        so the lineage graph can be fetched incrementally. ``measure`` may be
+        repeated; ``max_nodes`` caps the neighbourhood (at most
+        LINEAGE_SUBGRAPH_MAX_NODES) and ``limit`` the nodes per page.
+        """
+        measure_names = [name for name in request.args.getlist('measure') if name]
+        if not measure_names:
+            return jsonify({"error": "At least one measure is required"}), 400
+        node_cap = app.config.get('LINEAGE_SUBGRAPH_MAX_NODES', 5000)
+        try:
+            depth_up = int(request.args.get('depth_up', 1))
+            depth_down = int(request.args.get('depth_down', 1))
+            max_nodes = min(int(request.args.get('max_nodes', node_cap)), node_cap)
+            limit = int(request.args.get('limit', app.config.get('LINEAGE_SUBGRAPH_PAGE_SIZE', 500)))
+            cursor = int(request.args.get('cursor', 0))
+        except ValueError:
+            return jsonify({"error": "depth_up, depth_down, max_nodes, limit and cursor must be integers"}), 400
+        if min(depth_up, depth_down, cursor) < 0 or max_nodes < 1 or limit < 1:
+            return jsonify({"error": "depth_up, depth_down and cursor must be >= 0, max_nodes and limit >= 1"}), 400
+
+        subgraph = get_lineage_view_processor().get_dependency_subgraph(
+            measure_names, depth_up=depth_up, depth_down=depth_down,
+            max_nodes=max_nodes, cursor=cursor, limit=limit)
+        if not subgraph['total_nodes']:
+            return jsonify({"error": f"Unknown measure: {', '.join(measure_names)}"}), 404
+        return jsonify(subgraph)
+
+    def lineage_layout_stats() -> Optional[Dict[str, Any]]:
+        """Time and crossings of the served lineage layout, or None while it is being computed."""
+        lvp = processor_cache.peek('lineage')
+        layout = lvp.layout(timeout=0) if lvp is not None else None
+        return layout.stats() if layout is not None else None
+
+    @app.route('/api/cache-stats', methods=['GET'])
+    def get_cache_stats():
+        """API endpoint exposing processor cache hits, misses and build times."""
+        return jsonify({
+            'processors': processor_cache.stats(),
+            'derived': processor_cache.derived_stats(),
+            'pages': page_cache.stats() if page_cache is not None else None,
+            'compression': compressor.stats() if compressor is not None else None,
+            'lineage_layout': lineage_layout_stats()
+        })
+
     # Register error handlers
     @app.errorhandler(404)
     def page_not_found(e):
@@ -964,6 +1231,14 @@ def create_app(config_object=None) -> Flask:
     def server_error(e):
         return render_template('error.html', error=e.description, code=500), 500
 
+    @app.errorhandler(StaleDataError)
+    def stale_data(e):
+        # A data file was rewritten in place under a processor in use; rebuild
+        # it on the next request rather than serve (and cache) a wrong page
+        current_app.logger.warning(f"{e}; discarding {', '.join(processor_cache.discard(e.path))}")
+        description = "The data files changed while this page was being built. Please reload the page."
+        return render_template('error.html', error=description, code=503), 503, {'Retry-After': '1'}
+
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,68 @@
+import os
+
+import click
+from flask import Flask
+
+import json_backend
+from lineage_layout import LayeredLayout
+from lineage_view import LineageView
+from snapshot import build_snapshot
+
+
+def register_commands(app: Flask) -> None:
+    """Register the ``flask`` command-line entry points for offline work."""
+
+    @app.cli.command('precompute')
+    @click.option('--output', '-o', default=None,
+                  help='Snapshot path (defaults to SNAPSHOT_PATH from the configuration).')
+    def precompute_command(output):
+        """Parse the data files once and write the analysis snapshot."""
+        cache = app.extensions['processor_cache']
+        summary = build_snapshot(cache, output or app.config['SNAPSHOT_PATH'])
+        for name, stats in cache.stats().items():
+            click.echo(f"{name:8} built in {stats['last_build_seconds']:.3f}s")
+        click.echo(f"Wrote {summary['bytes']:,} bytes to {summary['path']} ({', '.join(summary['entries'])})")
+
+    @app.cli.command('json-benchmark')
+    @click.option('--repeat', '-r', default=3, show_default=True, help='Timed passes per backend.')
+    def json_benchmark_command(repeat):
+        """Compare the installed JSON backends on the configured data files."""
+        workloads = []
+        for label, key in (('report.json', 'REPORT_JSON_PATH'), ('model.json', 'MODEL_JSON_PATH')):
+            path = app.config[key]
+            if not os.path.exists(path):
+                click.echo(f"Skipping {label}: {path} not found")
+                continue
+            with open(path, 'r', encoding='utf-8') as file:
+                workloads.append((label, [file.read()]))
+
+        if workloads and workloads[0][0] == 'report.json':
+            # The thousands of small nested documents parsed for every visual
+            report = json_backend.JsonBackend('json').loads(workloads[0][1][0])
+            nested = [report.get('config') or '{}', report.get('filters') or '[]']
+            for section in report.get('sections', []):
+                nested.append(section.get('filters') or '[]')
+                for visual in section.get('visualContainers', []):
+                    nested.append(visual.get('config') or '{}')
+                    nested.append(visual.get('filters') or '[]')
+            workloads.append((f"nested configs ({len(nested):,})", nested))
+
+        click.echo(f"{'workload':28} {'backend':9} {'seconds':>9} {'peak MB':>9}")
+        for label, payloads in workloads:
+            for name in json_backend.available_backends():
+                result = json_backend.benchmark(json_backend.JsonBackend(name), payloads, repeat)
+                click.echo(f"{label:28} {name:9} {result['seconds']:9.3f} {result['peak_bytes'] / 1e6:9.1f}")
+        click.echo(f"Active backend: {json_backend.get_backend().name} (set JSON_BACKEND to choose)")
+
+    @app.cli.command('lineage-layout')
+    @click.option('--sweeps', '-s', default=4, show_default=True, help='Barycenter sweeps for crossing reduction.')
+    def lineage_layout_command(sweeps):
+        """Lay out the lineage diagram and report the time taken and edge crossings."""
+        # A fresh parse, so no layout is already running in the background
+        lineage = LineageView(app.config['MEASURE_DEPENDENCIES_TSV_PATH'])
+        lineage.process_lineage_data()
+        layout = LayeredLayout(lineage.nodes, lineage.edges, lineage.get_measure_levels(), sweeps=sweeps)
+        stats = layout.stats()
+        click.echo(f"{stats['nodes']:,} nodes on {stats['layers']} layers ({stats['dummy_nodes']:,} dummy nodes)")
+        click.echo(f"Crossings: {stats['initial_crossings']:,} before, {stats['crossings']:,} after {sweeps} sweeps")
+        click.echo(f"Laid out in {stats['seconds']:.3f}s")
@@ -0,0 +1,100 @@
+import gzip
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv',
+    'application/json', 'application/javascript', 'text/javascript',
+}
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the output deterministic for identical pages
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+_zstd_local = threading.local()
+
+
+def _zstd(data: bytes) -> bytes:
+    # ZstdCompressor is not thread-safe, so each request thread keeps its own
+    compressor = getattr(_zstd_local, 'compressor', None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=10)
+    return compressor.compress(data)
+
+
+def _available_codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    # Ordered by preference when the client accepts several with equal quality
+    codecs: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        codecs['zstd'] = _zstd
+    if brotli is not None:
+        codecs['br'] = lambda data: brotli.compress(data, quality=5)
+    codecs['gzip'] = _gzip
+    return codecs
+
+
+class ResponseCompressor:
+    """
+    Content-negotiated response compression (gzip always; zstd and brotli when
+    their modules are importable) with running totals of bytes saved.
+    """
+
+    def __init__(self, min_size: int = 1024) -> None:
+        self.min_size = min_size
+        self.codecs = _available_codecs()
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.cached_responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def encodings(self) -> List[str]:
+        return list(self.codecs)
+
+    def choose_encoding(self, accept_encodings: Any) -> Optional[str]:
+        """Pick the best encoding from a Werkzeug ``Accept-Encoding`` header object."""
+        return accept_encodings.best_match(self.encodings)
+
+    def should_compress(self, response: Any) -> bool:
+        return (response.status_code == 200
+                and not response.direct_passthrough
+                and 'Content-Encoding' not in response.headers
+                and response.mimetype in COMPRESSIBLE_MIMETYPES
+                and (response.content_length or 0) >= self.min_size)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        return self.codecs[encoding](data)
+
+    def record(self, original_size: int, compressed_size: int, from_cache: bool) -> None:
+        with self._lock:
+            self.responses += 1
+            if from_cache:
+                self.cached_responses += 1
+            self.bytes_in += original_size
+            self.bytes_out += compressed_size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'encodings': self.encodings,
+                'min_size': self.min_size,
+                'responses': self.responses,
+                'served_from_cache': self.cached_responses,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': self.bytes_in - self.bytes_out,
+            }
@@ -16,11 +16,15 @@ class Config:
     REPORT_JSON_PATH = os.path.join(DATA_DIR, 'report.json')
     MEASURE_DEPENDENCIES_TSV_PATH = os.path.join(DATA_DIR, 'MeasureDependencies.tsv')
     MODEL_JSON_PATH = os.path.join(DATA_DIR, 'model.json')
+    # Precomputed analysis written by `flask precompute`, loaded at startup when still valid
+    SNAPSHOT_PATH = os.path.join(DATA_DIR, 'analysis.snapshot')
     
     # UI configuration
     APP_NAME = "Power BI Analysis Tool"
     APP_VERSION = "1.0.0"
     APP_AUTHOR = "Dimitrios"
+    # Part of every page's ETag; bump when templates change so browsers re-fetch
+    TEMPLATE_VERSION = f"{APP_VERSION}+4"
     
     # Feature flags
     ENABLE_MODEL_INSIGHTS = True
@@ -31,6 +35,32 @@ class Config:
     
     # Performance settings
     MAX_VISUALS_PER_PAGE = 100
+    # Load the precomputed analysis snapshot at startup when it matches the data files
+    SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    # Also hash file contents when size/mtime change, so re-copied identical files are not re-parsed
+    PROCESSOR_CACHE_HASH_CONTENT = os.environ.get('PROCESSOR_CACHE_HASH_CONTENT', 'false').lower() == 'true'
+    # Stream report.json section by section to bound peak memory on very large reports
+    REPORT_STREAMING = os.environ.get('REPORT_STREAMING', 'false').lower() == 'true'
+    # JSON decoder: auto (fastest installed), orjson, simdjson, ujson or json; see `flask json-benchmark`
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    # Worker processes for extracting visuals from large reports (0 or 1 = in-process)
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', '0'))
+    # Memory budget of the lineage reachability index; larger graphs are walked per query (0 = always walk)
+    LINEAGE_INDEX_MAX_BYTES = int(os.environ.get('LINEAGE_INDEX_MAX_BYTES', str(64 * 1024 * 1024)))
+    # Largest neighbourhood /api/lineage-subgraph collects, and its default page size (nodes)
+    LINEAGE_SUBGRAPH_MAX_NODES = int(os.environ.get('LINEAGE_SUBGRAPH_MAX_NODES', '5000'))
+    LINEAGE_SUBGRAPH_PAGE_SIZE = int(os.environ.get('LINEAGE_SUBGRAPH_PAGE_SIZE', '500'))
+    # Seconds /lineage-view waits for the background diagram layout before the browser lays it out instead
+    LINEAGE_LAYOUT_WAIT = float(os.environ.get('LINEAGE_LAYOUT_WAIT', '1.0'))
+    # Re-parse changed data files in a background thread instead of on request
+    DATA_WATCHER_ENABLED = os.environ.get('DATA_WATCHER_ENABLED', 'false').lower() == 'true'
+    DATA_WATCHER_INTERVAL = float(os.environ.get('DATA_WATCHER_INTERVAL', '2.0'))
+    # Keep rendered HTML of the heavy pages until the data changes (LRU, bounded by bytes)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', str(128 * 1024 * 1024)))
+    # gzip (plus zstd/brotli when installed) for text responses of at least this many bytes
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
 
 
 class DevelopmentConfig(Config):
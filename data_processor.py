@@ -1,5 +1,54 @@
 ﻿import json
-from typing import Any, Dict, List, Optional, Set
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import json_backend
+from json_stream import JsonStreamReader
+
+# How a node reached by _scan_objects relates to field extraction: directly under a
+# dict key (may itself be a field reference), a list item (only searched when it is
+# a dict), or below a field reference / nested list (feature keys only).
+_FIELD_VALUE = 0
+_FIELD_ITEM = 1
+_KEYS_ONLY = 2
+
+
+class VisualRecord:
+    """
+    One entry of the report's visual inventory: a visual, or a page/global
+    filter row. Field columns are tuples of IDs into the owning processor's
+    ``field_names`` table, so each distinct field name is stored only once.
+    """
+
+    __slots__ = ('page', 'visual_type', 'visual_name', 'fields', 'filter_fields', 'vc_fields', 'object_fields')
+
+    FIELD_COLUMNS = ('fields', 'filter_fields', 'vc_fields', 'object_fields')
+
+    def __init__(self, page: str, visual_type: str, visual_name: str, fields: Tuple[int, ...] = (),
+                 filter_fields: Tuple[int, ...] = (), vc_fields: Tuple[int, ...] = (),
+                 object_fields: Tuple[int, ...] = ()) -> None:
+        self.page = page
+        self.visual_type = visual_type
+        self.visual_name = visual_name
+        self.fields = fields
+        self.filter_fields = filter_fields
+        self.vc_fields = vc_fields
+        self.object_fields = object_fields
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, VisualRecord):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
 
 
 class DataProcessor:
@@ -9,13 +58,27 @@ class DataProcessor:
         'stylePreset', 'effects', 'general', 'fill', 'line', 'shape', 'image', 'actions',
         'conditionalFormatting'
     }
+    # Formatting payloads nest a handful of levels; anything deeper is not walked
+    _MAX_OBJECTS_DEPTH = 64
+    # Below this many visuals starting a process pool costs more than it saves
+    _PARALLEL_MIN_VISUALS = 500
+    _CHUNKS_PER_WORKER = 4
 
-    def __init__(self, json_file_path: str):
+    def __init__(self, json_file_path: str, streaming: bool = False, workers: int = 0):
         self.json_file_path = json_file_path
+        # Walk report.json one section / visual container at a time instead of
+        # loading the whole document, keeping peak memory near the largest section
+        self.streaming = streaming
+        # Extract visuals in this many worker processes (non-streaming mode only)
+        self.workers = workers
         self._reset_state()
 
     def _reset_state(self) -> None:
-        self.visuals_data: List[List[str]] = []
+        self.load_error: Optional[str] = None
+        self.report_name: Optional[str] = None
+        self.visual_records: List[VisualRecord] = []
+        self.field_names: List[str] = []
+        self._field_ids: Dict[str, int] = {}
         self.theme_info: Dict[str, Any] = {}
         self.bookmark_summaries: List[Dict[str, Any]] = []
         self.visual_layouts: List[Dict[str, Any]] = []
@@ -23,43 +86,233 @@ class DataProcessor:
         self.visual_queries: List[Dict[str, Any]] = []
         self.navigation_items: List[Dict[str, Any]] = []
 
+    _SNAPSHOT_FIELDS = ('report_name', 'visual_records', 'field_names', 'theme_info', 'bookmark_summaries', 'visual_layouts',
+                        'visual_formatting', 'visual_queries', 'navigation_items')
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self._SNAPSHOT_FIELDS}
+
+    @classmethod
+    def from_snapshot(cls, json_file_path: str, state: Dict[str, Any]) -> 'DataProcessor':
+        processor = cls(json_file_path)
+        for field in cls._SNAPSHOT_FIELDS:
+            setattr(processor, field, state[field])
+        processor._field_ids = {name: field_id for field_id, name in enumerate(processor.field_names)}
+        # Unpickling creates a separate int object per reference; point every
+        # record back at one shared object per field ID.
+        field_ids = list(processor._field_ids.values())
+        for record in processor.visual_records:
+            for column in VisualRecord.FIELD_COLUMNS:
+                ids = getattr(record, column)
+                if ids:
+                    setattr(record, column, tuple(field_ids[field_id] for field_id in ids))
+        return processor
+
+    @property
+    def visuals_data(self) -> List[List[str]]:
+        """
+        Legacy view of ``visual_records`` as 7-column rows with "; "-joined field
+        columns. Built on every access; prefer the records where possible.
+        """
+        return [self.record_row(record) for record in self.visual_records]
+
+    def record_row(self, record: VisualRecord) -> List[str]:
+        names = self.field_names
+        return [record.page, record.visual_type, record.visual_name] + [
+            "; ".join(names[field_id] for field_id in getattr(record, column))
+            for column in VisualRecord.FIELD_COLUMNS
+        ]
+
+    def record_fields(self, record: VisualRecord, column: str = 'fields') -> List[str]:
+        names = self.field_names
+        return [names[field_id] for field_id in getattr(record, column)]
+
+    def _intern_fields(self, names: List[str]) -> Tuple[int, ...]:
+        field_ids = self._field_ids
+        interned = []
+        for name in names:
+            field_id = field_ids.get(name)
+            if field_id is None:
+                field_id = field_ids[name] = len(self.field_names)
+                self.field_names.append(name)
+            interned.append(field_id)
+        return tuple(interned)
+
     def process_json(self) -> None:
         self._reset_state()
         try:
             with open(self.json_file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-        except json.JSONDecodeError:
+                if self.streaming:
+                    self._process_json_stream(JsonStreamReader(file))
+                    return
+                data = json_backend.loads(file.read())
+            self._process_document(data)
+        except json.JSONDecodeError as e:
+            # Visual configs and filters are JSON strings of their own; drop
+            # whatever was extracted before the one that failed
+            self._reset_state()
             print("Error reading or parsing the JSON file.")
-            return
+            self.load_error = f"Unable to parse {self.json_file_path}: {e}"
 
+    def _process_document(self, data: Dict[str, Any]) -> None:
+        if 'name' in data:
+            self.report_name = data['name']
         self._extract_config_data(data.get('config'))
 
-        page_filters = json.loads(data.get('filters', '[]'))
-        if page_filters:
-            filter_name = page_filters[0].get('name', '')
-            page_filter_fields = self.extract_filter_fields(page_filters)
-            if page_filter_fields:
-                self.visuals_data.append(
-                    ['All Pages', 'Global Level Filters', filter_name, '', page_filter_fields, '', ''])
+        global_filter_row = self._filter_row(data.get('filters', '[]'), 'All Pages', 'Global Level Filters')
+        if global_filter_row:
+            self.visual_records.append(global_filter_row)
 
-        for section in data.get('sections', []):
+        sections = data.get('sections', [])
+        if self.workers > 1 and self._process_sections_parallel(sections):
+            return
+        for section in sections:
             self.process_section(section)
 
+    def _process_json_stream(self, reader: JsonStreamReader) -> None:
+        for key in reader.iter_object():
+            if key == 'sections':
+                for _ in reader.iter_array():
+                    self._process_section_stream(reader)
+            elif key == 'name':
+                self.report_name = reader.read_value()
+            elif key == 'config':
+                self._extract_config_data(reader.read_value())
+            elif key == 'filters':
+                global_filter_row = self._filter_row(reader.read_value(), 'All Pages', 'Global Level Filters')
+                if global_filter_row:
+                    # The key may come after 'sections'; the row always leads.
+                    self.visual_records.insert(0, global_filter_row)
+            else:
+                reader.skip_value()
+
+    def _process_section_stream(self, reader: JsonStreamReader) -> None:
+        section_start = len(self.visual_records)
+        page_name: Any = ''
+        has_page_name = False
+        section_filters = '[]'
+        buffered_visuals: List[dict] = []
+
+        for key in reader.iter_object():
+            if key == 'displayName':
+                page_name = reader.read_value()
+                has_page_name = True
+            elif key == 'filters':
+                section_filters = reader.read_value()
+            elif key == 'visualContainers':
+                if not has_page_name:
+                    # The page name is needed for every visual record; hold the
+                    # containers until it has been read.
+                    buffered_visuals = reader.read_value()
+                    continue
+                for _ in reader.iter_array():
+                    self.visual_records.append(self.extract_visual_data(reader.read_value(), page_name))
+            else:
+                reader.skip_value()
+
+        for visual in buffered_visuals:
+            self.visual_records.append(self.extract_visual_data(visual, page_name))
+
+        section_filter_row = self._filter_row(section_filters, page_name, 'Page Level Filters')
+        if section_filter_row:
+            self.visual_records.insert(section_start, section_filter_row)
+
     def process_section(self, section: dict) -> None:
-        section_filters = json.loads(section.get('filters', '[]'))
         page_name = section.get('displayName', '')
-        if section_filters:
-            filter_name = section_filters[0].get('name', '')
-            section_filter_fields = self.extract_filter_fields(section_filters)
-            if section_filter_fields:
-                self.visuals_data.append(
-                    [page_name, 'Page Level Filters', filter_name, '', section_filter_fields, '', ''])
+        section_filter_row = self._filter_row(section.get('filters', '[]'), page_name, 'Page Level Filters')
+        if section_filter_row:
+            self.visual_records.append(section_filter_row)
 
         for visual in section.get('visualContainers', []):
             visual_data = self.extract_visual_data(visual, page_name)
-            self.visuals_data.append(visual_data)
+            self.visual_records.append(visual_data)
+
+    def _process_sections_parallel(self, sections: List[dict]) -> bool:
+        """
+        Extract the visuals of all sections in a process pool. The visuals are cut
+        into chunks of similar size, so a giant page is split and small pages are
+        grouped together. Results are merged back in document order, which gives
+        the same state as processing the sections one by one. Returns False when
+        the report is too small for a pool to pay off or no pool can be started.
+        """
+        total_visuals = sum(len(section.get('visualContainers', [])) for section in sections)
+        if total_visuals < self._PARALLEL_MIN_VISUALS:
+            return False
+        chunk_size = -(-total_visuals // (self.workers * self._CHUNKS_PER_WORKER))
+
+        tasks: List[List[Tuple[Any, List[dict]]]] = []
+        segment_sections: List[int] = []
+        task: List[Tuple[Any, List[dict]]] = []
+        task_size = 0
+        for index, section in enumerate(sections):
+            page_name = section.get('displayName', '')
+            visuals = section.get('visualContainers', [])
+            for start in range(0, len(visuals), chunk_size):
+                segment = visuals[start:start + chunk_size]
+                task.append((page_name, segment))
+                segment_sections.append(index)
+                task_size += len(segment)
+                if task_size >= chunk_size:
+                    tasks.append(task)
+                    task = []
+                    task_size = 0
+        if task:
+            tasks.append(task)
 
-    def extract_filter_fields(self, filter_data: list) -> str:
+        try:
+            # spawn rather than fork: the app may have watcher threads running
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(_process_visual_segments, tasks,
+                                            [json_backend.get_backend().name] * len(tasks)))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Parallel report processing unavailable, continuing sequentially: {e}")
+            return False
+
+        segments = [(field_names, records)
+                    for field_names, record_segments, *_ in results
+                    for records in record_segments]
+        position = 0
+        for index, section in enumerate(sections):
+            section_filter_row = self._filter_row(section.get('filters', '[]'), section.get('displayName', ''),
+                                                  'Page Level Filters')
+            if section_filter_row:
+                self.visual_records.append(section_filter_row)
+            while position < len(segments) and segment_sections[position] == index:
+                field_names, records = segments[position]
+                position += 1
+                for record in records:
+                    self._adopt_record(record, field_names)
+
+        for _, _, layouts, formatting, queries, navigation in results:
+            self.visual_layouts.extend(layouts)
+            self.visual_formatting.extend(formatting)
+            self.visual_queries.extend(queries)
+            self.navigation_items.extend(navigation)
+        return True
+
+    def _adopt_record(self, record: VisualRecord, field_names: List[str]) -> None:
+        # Field IDs refer to the worker's table; re-intern in document order so
+        # IDs come out exactly as in a sequential run.
+        for column in VisualRecord.FIELD_COLUMNS:
+            ids = getattr(record, column)
+            if ids:
+                setattr(record, column, self._intern_fields([field_names[field_id] for field_id in ids]))
+        if isinstance(record.visual_type, str):
+            record.visual_type = sys.intern(record.visual_type)
+        self.visual_records.append(record)
+
+    def _filter_row(self, filters_payload: str, page_name: str, level: str) -> Optional[VisualRecord]:
+        filters = json_backend.loads(filters_payload)
+        if not filters:
+            return None
+        filter_name = filters[0].get('name', '')
+        filter_fields = self.extract_filter_fields(filters)
+        if not filter_fields:
+            return None
+        return VisualRecord(page_name, level, filter_name, filter_fields=self._intern_fields(filter_fields))
+
+    def extract_filter_fields(self, filter_data: list) -> List[str]:
         filter_fields = []
         for f in filter_data:
             if 'expression' in f:
@@ -73,10 +326,10 @@ class DataProcessor:
                     described = self._describe_expression(condition)
                     if described:
                         filter_fields.append(described)
-        return "; ".join(filter_fields)
+        return filter_fields
 
-    def extract_visual_data(self, visual: dict, page_name: str) -> List[str]:
-        config = json.loads(visual['config'])
+    def extract_visual_data(self, visual: dict, page_name: str) -> VisualRecord:
+        config = json_backend.loads(visual['config'])
 
         visual_config = None
         for key in config:
@@ -85,15 +338,22 @@ class DataProcessor:
                 visual_config = candidate
                 break
         if not visual_config:
-            return [page_name, "Unknown visual type", "", "", "", '', '']
+            return VisualRecord(page_name, "Unknown visual type", "")
 
         visual_type = visual_config.get('visualType', '')
+        if isinstance(visual_type, str):
+            # A report repeats a handful of visual types thousands of times
+            visual_type = sys.intern(visual_type)
         visual_name = config.get('name', '')
 
-        self._collect_visual_metadata(page_name, visual_name, visual_type, config, visual_config)
+        object_scan = self._scan_objects(visual_config.get('objects', {}))
+        vc_objects_scan = self._scan_objects(visual_config.get('vcObjects', {}))
+
+        self._collect_visual_metadata(page_name, visual_name, visual_type, config, visual_config,
+                                      object_scan[0], vc_objects_scan[0])
 
         if 'prototypeQuery' not in visual_config:
-            return [page_name, visual_type, visual_name, "", "", '', '']
+            return VisualRecord(page_name, visual_type, visual_name)
 
         entity_aliases = {item['Name']: item['Entity']
                           for item in visual_config['prototypeQuery'].get('From', [])}
@@ -102,20 +362,18 @@ class DataProcessor:
             visual_config['prototypeQuery'].get('Select', []), entity_aliases)
 
         filter_data = visual.get('filters', '[]')
-        filter_data = json.loads(filter_data)
+        filter_data = json_backend.loads(filter_data)
         filter_fields = self.extract_filter_fields(filter_data)
 
-        object_data = visual_config.get('objects', {})
-        object_fields = self.extract_vc_objects_fields(object_data)
-
-        vc_objects_data = visual_config.get('vcObjects', {})
-        vc_objects_fields = self.extract_vc_objects_fields(vc_objects_data)
-
         prototype_query = visual_config.get('prototypeQuery', {})
         if prototype_query:
             self._record_query_details(page_name, visual_name, visual_type, prototype_query)
 
-        return [page_name, visual_type, visual_name, select_fields, filter_fields, vc_objects_fields, object_fields]
+        return VisualRecord(page_name, visual_type, visual_name,
+                            fields=self._intern_fields(select_fields),
+                            filter_fields=self._intern_fields(filter_fields),
+                            vc_fields=self._intern_fields(vc_objects_scan[1]),
+                            object_fields=self._intern_fields(object_scan[1]))
 
     def extract_objects_fields(self, objects_data: Any) -> str:
         fields: List[str] = []
@@ -146,28 +404,49 @@ class DataProcessor:
                             extracted_fields.append(f"{entity}[{property_name}]")
         return extracted_fields
 
-    def extract_vc_objects_fields(self, vc_object: Any, current_entity: Optional[str] = None) -> str:
+    def extract_vc_objects_fields(self, vc_object: Any) -> str:
+        return "; ".join(self._scan_objects(vc_object)[1])
+
+    def _scan_objects(self, container: Any) -> Tuple[Set[str], List[str]]:
+        """
+        Walk an ``objects``/``vcObjects`` payload once, iteratively, and return
+        the known feature keys found at any depth together with the
+        ``Entity[Property]`` field references in document order. A dict that
+        is a field reference is not searched for further fields. Nesting below
+        ``_MAX_OBJECTS_DEPTH`` is skipped rather than risking the recursion limit.
+        """
+        known_keys = self._KNOWN_FEATURE_KEYS
+        max_depth = self._MAX_OBJECTS_DEPTH
+        features: Set[str] = set()
         fields: List[str] = []
-        if isinstance(vc_object, dict):
-            for key, value in vc_object.items():
-                if isinstance(value, dict):
-                    if 'Expression' in value and 'SourceRef' in value['Expression'] and 'Property' in value:
-                        entity = value['Expression']['SourceRef'].get('Entity', current_entity)
-                        property_name = value['Property']
-                        if entity:
-                            fields.append(f"{entity}[{property_name}]")
-                    else:
-                        nested = self.extract_vc_objects_fields(value, current_entity)
-                        if nested:
-                            fields.extend(nested.split("; "))
-                elif isinstance(value, list):
-                    for item in value:
-                        nested = self.extract_vc_objects_fields(item, current_entity)
-                        if nested:
-                            fields.extend(nested.split("; "))
-        return "; ".join(filter(None, fields))
+        stack: List[Tuple[Any, int, int]] = [(container, 0, _FIELD_ITEM)]
+        while stack:
+            node, depth, mode = stack.pop()
+            if isinstance(node, dict):
+                if (mode == _FIELD_VALUE and 'Expression' in node
+                        and 'SourceRef' in node['Expression'] and 'Property' in node):
+                    entity = node['Expression']['SourceRef'].get('Entity')
+                    if entity:
+                        fields.append(f"{entity}[{node['Property']}]")
+                    child_mode = _KEYS_ONLY
+                else:
+                    child_mode = _KEYS_ONLY if mode == _KEYS_ONLY else _FIELD_VALUE
+                features.update(known_keys.intersection(node))
+                children = node.values()
+            elif isinstance(node, list):
+                child_mode = _FIELD_ITEM if mode == _FIELD_VALUE else _KEYS_ONLY
+                children = node
+            else:
+                continue
+            if depth >= max_depth:
+                continue
+            # Pushed in reverse so they are popped in document order
+            for child in reversed(children):
+                if isinstance(child, (dict, list)):
+                    stack.append((child, depth + 1, child_mode))
+        return features, fields
 
-    def extract_fields(self, fields: List[Dict[str, Any]], entity_aliases: Dict[str, str]) -> str:
+    def extract_fields(self, fields: List[Dict[str, Any]], entity_aliases: Dict[str, str]) -> List[str]:
         extracted_fields: List[str] = []
         for field in fields:
             if 'Column' in field:
@@ -188,39 +467,34 @@ class DataProcessor:
                 field_name = f"{entity_name}[{property_name}]"
                 extracted_fields.append(field_name)
 
-        return "; ".join(extracted_fields)
+        return extracted_fields
 
     def get_used_measures(self, known_measures: Optional[Set[str]] = None) -> Set[str]:
-        used_measures: Set[str] = set()
-        lookup = None
+        used_field_ids: Set[int] = set()
+        for record in self.visual_records:
+            used_field_ids.update(record.fields, record.filter_fields, record.vc_fields, record.object_fields)
 
+        lookup = None
         if known_measures:
             lookup = {name.lower(): name for name in known_measures}
 
-        for visual_data in self.visuals_data:
-            for index in [3, 4, 5, 6]:
-                if index >= len(visual_data):
-                    continue
-
-                field_block = visual_data[index]
-                if not field_block:
-                    continue
-
-                for field in field_block.split('; '):
-                    field = field.strip()
-                    if not field or '[' not in field or not field.endswith(']'):
-                        continue
+        # Each distinct field name is examined once, however many visuals use it
+        used_measures: Set[str] = set()
+        for field_id in used_field_ids:
+            field = self.field_names[field_id].strip()
+            if not field or '[' not in field or not field.endswith(']'):
+                continue
 
-                    candidate = field[field.rfind('[') + 1:-1].strip()
-                    if not candidate:
-                        continue
+            candidate = field[field.rfind('[') + 1:-1].strip()
+            if not candidate:
+                continue
 
-                    if lookup is not None:
-                        match = lookup.get(candidate.lower())
-                        if match:
-                            used_measures.add(match)
-                    else:
-                        used_measures.add(candidate)
+            if lookup is not None:
+                match = lookup.get(candidate.lower())
+                if match:
+                    used_measures.add(match)
+            else:
+                used_measures.add(candidate)
 
         return used_measures
 
@@ -246,7 +520,7 @@ class DataProcessor:
         if not config_payload:
             return
         try:
-            config_data = json.loads(config_payload)
+            config_data = json_backend.loads(config_payload)
         except json.JSONDecodeError:
             return
 
@@ -338,10 +612,11 @@ class DataProcessor:
         return None
 
     def _collect_visual_metadata(self, page_name: str, visual_name: str, visual_type: str,
-                                  config: Dict[str, Any], visual_config: Dict[str, Any]) -> None:
+                                  config: Dict[str, Any], visual_config: Dict[str, Any],
+                                  object_features: Set[str], vc_object_features: Set[str]) -> None:
         self._record_layout(page_name, visual_name, visual_type, config)
         self._record_navigation(page_name, visual_name, visual_type, visual_config)
-        self._record_formatting(page_name, visual_name, visual_type, visual_config)
+        self._record_formatting(page_name, visual_name, visual_type, object_features, vc_object_features)
 
     def _record_layout(self, page_name: str, visual_name: str, visual_type: str,
                         config: Dict[str, Any]) -> None:
@@ -383,20 +658,18 @@ class DataProcessor:
             })
 
     def _record_formatting(self, page_name: str, visual_name: str, visual_type: str,
-                           visual_config: Dict[str, Any]) -> None:
-        objects_data = visual_config.get('objects', {})
-        vc_objects = visual_config.get('vcObjects', {})
+                           object_features: Set[str], vc_object_features: Set[str]) -> None:
         formatting_summary = {
             'page': page_name,
             'visual_name': visual_name,
             'visual_type': visual_type,
-            'has_custom_tooltip': self._contains_key(vc_objects, 'visualTooltip'),
-            'has_custom_title': self._contains_key(objects_data, 'title') or self._contains_key(vc_objects, 'title'),
-            'has_background': self._contains_key(objects_data, 'background') or self._contains_key(vc_objects, 'background'),
-            'has_border': self._contains_key(objects_data, 'border') or self._contains_key(vc_objects, 'border'),
-            'has_drop_shadow': self._contains_key(vc_objects, 'dropShadow'),
-            'object_features': sorted(self._find_known_keys(objects_data)),
-            'vc_object_features': sorted(self._find_known_keys(vc_objects))
+            'has_custom_tooltip': 'visualTooltip' in vc_object_features,
+            'has_custom_title': 'title' in object_features or 'title' in vc_object_features,
+            'has_background': 'background' in object_features or 'background' in vc_object_features,
+            'has_border': 'border' in object_features or 'border' in vc_object_features,
+            'has_drop_shadow': 'dropShadow' in vc_object_features,
+            'object_features': sorted(object_features),
+            'vc_object_features': sorted(vc_object_features)
         }
         self.visual_formatting.append(formatting_summary)
 
@@ -438,23 +711,12 @@ class DataProcessor:
             'top': top_summary
         })
 
-    def _contains_key(self, container: Any, target: str) -> bool:
-        if isinstance(container, dict):
-            if target in container:
-                return True
-            return any(self._contains_key(value, target) for value in container.values())
-        if isinstance(container, list):
-            return any(self._contains_key(item, target) for item in container)
-        return False
-
-    def _find_known_keys(self, container: Any) -> Set[str]:
-        found: Set[str] = set()
-        if isinstance(container, dict):
-            for key, value in container.items():
-                if key in self._KNOWN_FEATURE_KEYS:
-                    found.add(key)
-                found.update(self._find_known_keys(value))
-        elif isinstance(container, list):
-            for item in container:
-                found.update(self._find_known_keys(item))
-        return found
+
+def _process_visual_segments(segments: List[Tuple[Any, List[dict]]], backend: str) -> Tuple[Any, ...]:
+    """Process-pool worker for DataProcessor._process_sections_parallel."""
+    json_backend.set_backend(backend)
+    processor = DataProcessor('')
+    record_segments = [[processor.extract_visual_data(visual, page_name) for visual in visuals]
+                       for page_name, visuals in segments]
+    return (processor.field_names, record_segments, processor.visual_layouts, processor.visual_formatting,
+            processor.visual_queries, processor.navigation_items)
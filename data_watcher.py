@@ -0,0 +1,99 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from processor_cache import FileFingerprint, ProcessorCache
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # pragma: no cover - optional dependency
+    INotify = None
+    inotify_flags = None
+
+
+class DataWatcher:
+    """
+    Background thread that keeps a ``ProcessorCache`` in sync with the data files.
+
+    Changes are detected with inotify when ``inotify_simple`` is installed and by
+    polling otherwise. A change is only acted on once the file's fingerprint has
+    been stable for one interval, so half-copied exports are not parsed. The
+    rebuild itself goes through ``ProcessorCache.refresh``, which swaps the new
+    version in atomically and keeps the last good one if parsing fails.
+    """
+
+    def __init__(self, cache: ProcessorCache, interval: float = 2.0, logger: Any = None,
+                 use_inotify: bool = True) -> None:
+        self.cache = cache
+        self.interval = interval
+        self.logger = logger
+        self.use_inotify = use_inotify and INotify is not None
+        self._pending: Dict[str, Optional[FileFingerprint]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify = None
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self.use_inotify else 'polling'
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.use_inotify:
+            self._inotify = INotify()
+            watch_flags = (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                           | inotify_flags.CREATE | inotify_flags.DELETE)
+            for directory in {os.path.dirname(os.path.abspath(self.cache.path(name))) for name in self.cache.names()}:
+                if os.path.isdir(directory):
+                    self._inotify.add_watch(directory, watch_flags)
+        self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+        self._thread.start()
+        if self.logger is not None:
+            self.logger.info("Watching data files for changes (%s, every %.1fs)", self.mode, self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                # Returns early on file events; an empty read means the
+                # directory was quiet for a whole interval.
+                self._inotify.read(timeout=int(self.interval * 1000))
+            else:
+                self._stop.wait(self.interval)
+            if self._stop.is_set():
+                break
+            self.check()
+
+    def check(self) -> None:
+        """Refresh every processor whose file changed and has since settled."""
+        for name in self.cache.names():
+            served = self.cache.served_fingerprint(name)
+            if served is None:
+                # Never requested yet; the first reader builds it.
+                continue
+            current = self.cache.current_fingerprint(name)
+            if current is None or current == served:
+                self._pending.pop(name, None)
+                continue
+            if self._pending.get(name) != current:
+                self._pending[name] = current
+                continue
+            self._pending.pop(name, None)
+            try:
+                refreshed = self.cache.refresh(name)
+            except Exception as e:
+                # refresh() only raises when there is nothing to fall back to.
+                if self.logger is not None:
+                    self.logger.error("Refreshing %s failed: %s", name, e)
+                continue
+            if refreshed and self.logger is not None:
+                self.logger.info("Reloaded %s after a change to %s", name, self.cache.path(name))
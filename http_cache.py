@@ -0,0 +1,58 @@
+import datetime
+import hashlib
+from typing import Iterable, Optional
+
+from processor_cache import FileFingerprint
+
+
+def compute_etag(fingerprints: Iterable[Optional[FileFingerprint]], version: str) -> str:
+    """
+    Strong ETag for a response derived from the given data files.
+
+    Built only from file fingerprints and the template/app version, so it can be
+    computed before any parsing or rendering happens.
+    """
+    digest = hashlib.sha1(version.encode('utf-8'))
+    for fingerprint in fingerprints:
+        if fingerprint is None:
+            digest.update(b'missing')
+        else:
+            digest.update(f"{fingerprint.path}|{fingerprint.size}|{fingerprint.mtime_ns}|"
+                          f"{fingerprint.content_hash or ''}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def last_modified_from(fingerprints: Iterable[Optional[FileFingerprint]],
+                       released_ns: int = 0) -> Optional[datetime.datetime]:
+    """
+    Newest modification time of the data files, truncated to whole seconds as in HTTP dates.
+
+    ``released_ns`` is when the running templates were loaded (the app start).
+    Pages are never older than that, so a client that only sends
+    If-Modified-Since re-fetches them after a ``TEMPLATE_VERSION`` bump.
+    """
+    mtimes = [fingerprint.mtime_ns for fingerprint in fingerprints if fingerprint is not None]
+    if not mtimes:
+        return None
+    return datetime.datetime.fromtimestamp(max(max(mtimes), released_ns) // 1_000_000_000, tz=datetime.timezone.utc)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of a content-coded representation; strong ETags must differ per encoding."""
+    return f"{etag}-{encoding}"
+
+
+def is_not_modified(request, etag: str, last_modified: Optional[datetime.datetime],
+                    encodings: Iterable[str] = ()) -> bool:
+    """
+    Evaluate the request's conditional headers (RFC 9110 section 13.2.2):
+    If-None-Match wins over If-Modified-Since when both are present. ETags of
+    compressed representations (see ``encoded_etag``) match as well.
+    """
+    if request.if_none_match:
+        if request.if_none_match.star_tag or request.if_none_match.contains(etag):
+            return True
+        return any(request.if_none_match.contains(encoded_etag(etag, encoding)) for encoding in encodings)
+    if request.if_modified_since is not None and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
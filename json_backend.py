@@ -0,0 +1,127 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover - optional dependency
+    simdjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+
+JsonInput = Union[str, bytes]
+
+
+def _available_decoders() -> Dict[str, Callable[[JsonInput], Any]]:
+    # Ordered by preference for JSON_BACKEND=auto
+    decoders: Dict[str, Callable[[JsonInput], Any]] = {}
+    if orjson is not None:
+        decoders['orjson'] = orjson.loads
+    if simdjson is not None:
+        decoders['simdjson'] = simdjson.loads
+    if ujson is not None:
+        decoders['ujson'] = ujson.loads
+    decoders['json'] = json.loads
+    return decoders
+
+
+class JsonBackend:
+    """
+    A JSON decoder with the stdlib's error contract.
+
+    Fast backends are stricter than ``json`` in a few corners (NaN literals,
+    integers beyond 64 bits), so anything they reject is retried with the
+    stdlib: documents are accepted or refused exactly as before, and failures
+    always surface as ``json.JSONDecodeError``.
+    """
+
+    def __init__(self, name: str) -> None:
+        decoders = _available_decoders()
+        if name not in decoders:
+            raise ValueError(f"JSON backend '{name}' is not installed")
+        self.name = name
+        self._decode = decoders[name]
+
+    def loads(self, data: JsonInput) -> Any:
+        if self.name == 'json':
+            return json.loads(data)
+        try:
+            return self._decode(data)
+        except (ValueError, TypeError, OverflowError):
+            return json.loads(data)
+
+    def load_file(self, path: str, encoding: str = 'utf-8') -> Any:
+        with open(path, 'r', encoding=encoding) as file:
+            return self.loads(file.read())
+
+
+def available_backends() -> List[str]:
+    return list(_available_decoders())
+
+
+_current = JsonBackend(available_backends()[0])
+
+
+def set_backend(name: Optional[str] = 'auto') -> JsonBackend:
+    """
+    Select the process-wide backend. ``'auto'`` picks the fastest installed
+    one; an unknown or missing backend raises ``ValueError``.
+    """
+    global _current
+    if not name or name == 'auto':
+        name = available_backends()[0]
+    _current = JsonBackend(name)
+    return _current
+
+
+def get_backend() -> JsonBackend:
+    return _current
+
+
+def loads(data: JsonInput) -> Any:
+    return _current.loads(data)
+
+
+def load_file(path: str, encoding: str = 'utf-8') -> Any:
+    return _current.load_file(path, encoding)
+
+
+def benchmark(backend: JsonBackend, payloads: List[JsonInput], repeat: int = 3) -> Dict[str, float]:
+    """
+    Best-of-``repeat`` time to decode every payload (garbage collection off,
+    as in ``timeit``), and the tracemalloc peak of one pass with the decoded
+    objects held until the pass ends.
+    """
+    import gc
+    import time
+    import tracemalloc
+
+    best = float('inf')
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for payload in payloads:
+                backend.loads(payload)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        decoded = [backend.loads(payload) for payload in payloads]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del decoded
+    return {'seconds': best, 'peak_bytes': peak}
@@ -0,0 +1,133 @@
+import json
+from typing import Any, Iterator, TextIO
+
+
+class JsonStreamReader:
+    """
+    Incremental reader for one large JSON document.
+
+    Containers can be walked one member at a time with ``iter_object`` and
+    ``iter_array``; any member can instead be decoded in one go with
+    ``read_value``. Only the unread part of the current member is kept in
+    memory, so walking ``sections`` one page at a time needs memory
+    proportional to the largest page rather than the whole file.
+
+    Example::
+
+        for key in reader.iter_object():
+            if key == 'sections':
+                for _ in reader.iter_array():
+                    section = reader.read_value()
+            else:
+                reader.skip_value()
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 64 * 1024) -> None:
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, at_least: int = 0) -> bool:
+        if self._eof:
+            return False
+        if self._pos > self._chunk_size and self._pos * 2 > len(self._buffer):
+            # Drop what has been consumed so the buffer stays bounded
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._file.read(max(self._chunk_size, at_least))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            length = len(buffer)
+            while pos < length and buffer[pos] in ' \t\n\r':
+                pos += 1
+            self._pos = pos
+            if pos < length or not self._read_more():
+                return
+
+    def _peek(self) -> str:
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            raise self._error("Unexpected end of JSON input")
+        return self._buffer[self._pos]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues past the buffer; read at least
+                # as much again so retries stay linear overall.
+                if not self._read_more(len(self._buffer) - self._pos):
+                    raise
+                continue
+            if end >= len(self._buffer) and not self._eof and self._read_more():
+                # A number or literal may be cut off at the buffer boundary
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self) -> None:
+        self.read_value()
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        Yield the keys of the object at the current position. After each key
+        the caller must consume the member's value before resuming iteration.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise self._error("Expecting property name enclosed in double quotes")
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            separator = self._peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise self._error("Expecting ',' delimiter")
+
+    def iter_array(self) -> Iterator[int]:
+        """
+        Yield the index of each element of the array at the current position.
+        The caller must consume each element before resuming iteration.
+        """
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            separator = self._peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise self._error("Expecting ',' delimiter")
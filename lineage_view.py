@@ -1,8 +1,55 @@
 import csv
+import hashlib
+import io
+import mmap
+import threading
+from array import array
+
+from lineage_layout import LayeredLayout
+from measure_graph import MeasureGraph, ReachabilityIndex
+from processor_cache import StaleDataError
+
+# Largest reachability bitset index built before queries fall back to graph walks
+DEFAULT_REACHABILITY_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _unescape_dax(dax_expression):
+    # Replace escape sequences with their corresponding characters
+    dax_expression = dax_expression.replace('\\n', '\n')
+    dax_expression = dax_expression.replace('\\t', '\t')
+    dax_expression = dax_expression.replace('\\r', '\r')
+    return dax_expression
+
+
+def _ends_in_quotes(line, in_quotes, row_start):
+    """
+    Whether ``line`` ends inside a quoted field, following the states of
+    ``csv.reader`` (non-strict): a quote opens a field only at its start,
+    and a doubled quote inside a quoted field is a literal quote.
+    """
+    field_start = 0 if row_start and not in_quotes else -1
+    position = 0
+    length = len(line)
+    while position < length:
+        char = line[position]
+        if in_quotes:
+            if char == 0x22:  # '"'
+                if line[position + 1:position + 2] == b'"':
+                    position += 1
+                else:
+                    in_quotes = False
+        elif char == 0x09:  # '\t'
+            field_start = position + 1
+        elif char == 0x22 and position == field_start:
+            in_quotes = True
+        position += 1
+    return in_quotes
+
 
 class LineageView:
-    def __init__(self, tsv_file_path):
+    def __init__(self, tsv_file_path, reachability_max_bytes=DEFAULT_REACHABILITY_MAX_BYTES):
         self.tsv_file_path = tsv_file_path
+        self.reachability_max_bytes = reachability_max_bytes
         self.nodes = []
         self.edges = []
         self.measures_with_children = set()
@@ -14,154 +61,473 @@ class LineageView:
         self.CHILD_INDEX = 3
         self.COLUMN_INDEX = 5
         self.measure_data = {}  # Cache for measure data
+        # DAX stays in the file: byte offsets of each data row (start, end
+        # pairs) so a row can be decoded again when its expression is asked for
+        self._row_offsets = array('Q')
+        # Columnar copy of the TSV, one entry per data row; every measure set
+        # below is derived from these instead of re-reading the file
+        self._row_names = []
+        self._row_parents = []
+        self._row_children = []
+        self._row_columns = []
+        # Digest of each row's bytes, so a reload only re-parses changed rows
+        self._row_hashes = []
+        self._measure_rows = {}
+        # How many rows contribute each edge, column and measures_with_children
+        # entry, in order of first appearance
+        self._edge_counts = {}
+        self._column_counts = {}
+        self._child_counts = {}
+        self._all_measures = None
+        self._final_measures = None
+        self._graph = None
+        self._reachability = None
+        # Diagram layout, computed once in a background thread (see layout)
+        self._layout = None
+        self._layout_lock = threading.Lock()
+        self._layout_started = False
+        self._layout_done = threading.Event()
+        self._processed = False
+
+    def to_snapshot(self):
+        """Return the processed lineage state, including the diagram layout, for the analysis snapshot."""
+        layout = self.layout()
+        return {
+            'row_offsets': self._row_offsets,
+            'row_names': self._row_names,
+            'row_parents': self._row_parents,
+            'row_children': self._row_children,
+            'row_columns': self._row_columns,
+            'row_hashes': self._row_hashes,
+            'edge_counts': self._edge_counts,
+            'column_counts': self._column_counts,
+            'child_counts': self._child_counts,
+            'layout': layout.to_snapshot() if layout is not None else None,
+        }
 
-    def process_lineage_data(self):
-        with open(self.tsv_file_path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file, delimiter='\t')
-            headers = next(reader)  # Skip the header row
-            data = list(reader)  # Read the rest of the data
+    @classmethod
+    def from_snapshot(cls, tsv_file_path, state, reachability_max_bytes=DEFAULT_REACHABILITY_MAX_BYTES):
+        """Recreate a processed LineageView from ``to_snapshot`` output."""
+        lineage_view = cls(tsv_file_path, reachability_max_bytes)
+        lineage_view._row_offsets = state['row_offsets']
+        lineage_view._row_names = state['row_names']
+        lineage_view._row_parents = state['row_parents']
+        lineage_view._row_children = state['row_children']
+        lineage_view._row_columns = state['row_columns']
+        lineage_view._row_hashes = state['row_hashes']
+        lineage_view._edge_counts = state['edge_counts']
+        lineage_view._column_counts = state['column_counts']
+        lineage_view._child_counts = state['child_counts']
+        if state['layout'] is not None:
+            lineage_view._set_layout(LayeredLayout.from_snapshot(state['layout']))
+        lineage_view._publish()
+        lineage_view._processed = True
+        return lineage_view
+
+    @staticmethod
+    def _split_rows(file):
+        """
+        Yield ``(start, end, raw)`` for each data row of the binary ``file``.
 
-        # Process lineage data here
-        for measure in data:
-            measure_name = measure[self.MEASURE_INDEX]
-            self.nodes.append(
-                {'id': measure_name, 'label': measure_name, 'dax': measure[self.DAX_EXPRESSION_INDEX]})
+        Rows end at a newline outside a quoted field, exactly where
+        ``csv.reader`` would end them, so a row can be parsed on its own.
+        Only lines containing a quote need to be scanned for that.
+        """
+        position = 0
+        pending = []
+        row_start = 0
+        in_quotes = False
+        header = True
+        for raw_line in file:
+            line_start = position
+            position += len(raw_line)
+            if not pending:
+                row_start = line_start
+            pending.append(raw_line)
+            if in_quotes or b'"' in raw_line:
+                in_quotes = _ends_in_quotes(raw_line, in_quotes, len(pending) == 1)
+                if in_quotes:
+                    continue
+            raw = pending[0] if len(pending) == 1 else b''.join(pending)
+            pending = []
+            if header:
+                header = False  # Skip the header row
+                continue
+            yield row_start, position, raw
+        if pending and not header:
+            yield row_start, position, b''.join(pending)
+
+    @staticmethod
+    def _parse_row(raw):
+        # Decoded as text mode would (universal newlines), so fields are
+        # identical to reading the file with open(..., 'r')
+        text = raw.decode('utf-8').replace('\r\n', '\n')
+        return next(csv.reader(io.StringIO(text), delimiter='\t'))
+
+    def _read_dax(self, rows):
+        """
+        Decode the DAX column of the given row numbers from the indexed TSV.
+
+        The file is memory-mapped for the duration of the call only, so no
+        handle outlives it and the exporter can replace the file at any time.
+        Each row's bytes are checked against the digest taken when it was
+        indexed, so bytes of another file version are never parsed.
 
-            parent_measures = measure[self.PARENT_INDEX].split(
-                '; ') if measure[self.PARENT_INDEX] else []
-            has_parent = bool(parent_measures)
+        Returns:
+        list: ``(row, dax)`` pairs
 
+        Raises:
+        StaleDataError: If the file was changed or removed since it was indexed
+        """
+        if not rows:
+            return []
+        raw_rows = []
+        try:
+            with open(self.tsv_file_path, 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for row in rows:
+                    raw_rows.append((row, mapped[self._row_offsets[2 * row]:self._row_offsets[2 * row + 1]]))
+        except (OSError, ValueError) as e:
+            # Gone, or emptied (an empty file cannot be mapped)
+            raise StaleDataError(self.tsv_file_path) from e
+
+        dax_expressions = []
+        for row, raw in raw_rows:
+            if hashlib.sha256(raw).digest() != self._row_hashes[row]:
+                raise StaleDataError(self.tsv_file_path)
+            dax_expressions.append((row, self._parse_row(raw)[self.DAX_EXPRESSION_INDEX]))
+        return dax_expressions
+
+    def get_measure_dax(self, measure_name):
+        """
+        Get the DAX expression of one measure, with escape sequences replaced.
+
+        Parameters:
+        measure_name (str): Name of the measure
+
+        Returns:
+        str or None: The expression, or None for unknown measures
+        """
+        row = self._measure_rows.get(measure_name)
+        if row is None:
+            return None
+        for _, dax_expression in self._read_dax([row]):
+            return _unescape_dax(dax_expression)
+        return None
+
+    def _split_measure(self, measure):
+        parent_measures = measure[self.PARENT_INDEX].split(
+            '; ') if measure[self.PARENT_INDEX] else []
+        child_measures = measure[self.CHILD_INDEX].split(
+            '; ') if measure[self.CHILD_INDEX] else []
+        measure_columns = measure[self.COLUMN_INDEX].split(
+            '; ') if measure[self.COLUMN_INDEX] else []
+        return measure[self.MEASURE_INDEX], parent_measures, child_measures, measure_columns
+
+    def _row(self, row):
+        return self._row_names[row], self._row_parents[row], self._row_children[row], self._row_columns[row]
+
+    def _count_rows(self):
+        """Count the edges, columns and measures with children of every row, in file order."""
+        child_counts = self._child_counts = {}
+        column_counts = self._column_counts = {}
+        edge_counts = self._edge_counts = {}
+        for measure_name, parent_measures, child_measures, measure_columns in zip(
+                self._row_names, self._row_parents, self._row_children, self._row_columns):
             # Store all parent measures
-            if parent_measures:
-                for parent in parent_measures:
-                    if parent:
-                        self.measures_with_children.add(parent)
-
-            # Store all child measures
-            child_measures = measure[self.CHILD_INDEX].split(
-                '; ') if measure[self.CHILD_INDEX] else []
-            if child_measures:
-                for child in child_measures:
-                    if child:
-                        self.measures_with_children.add(measure_name)
+            for parent in parent_measures:
+                if parent:
+                    child_counts[parent] = child_counts.get(parent, 0) + 1
 
-            # Cache the measure data for later use
-            self.measure_data[measure_name] = {
-                'parent_measures': parent_measures,
-                'child_measures': child_measures,
-                'dax': measure[self.DAX_EXPRESSION_INDEX],
-                'columns': measure[self.COLUMN_INDEX].split('; ') if measure[self.COLUMN_INDEX] else []
-            }
+            # Store measures that have child measures
+            if any(child_measures):
+                child_counts[measure_name] = child_counts.get(measure_name, 0) + 1
 
             # Processing for columns
-            measure_columns = measure[self.COLUMN_INDEX].split(
-                '; ') if measure[self.COLUMN_INDEX] else []
             for column in measure_columns:
-                if not column:
-                    continue
+                if column:
+                    column_counts[column] = column_counts.get(column, 0) + 1
+                    edge = (column, measure_name)
+                    edge_counts[edge] = edge_counts.get(edge, 0) + 1
 
-                if column not in self.unique_columns:
-                    self.nodes.append(
-                        {'id': column, 'label': column, 'type': 'column'})
-                    self.unique_columns.add(column)
-
-                edge = (column, measure_name)
-                if edge not in self.unique_edges:
-                    self.unique_edges.add(edge)
-                    self.edges.append({'from': column, 'to': measure_name})
-
-            # Processing for parent-child relationships (existing logic)
+            # Processing for parent-child relationships
             for parent in parent_measures:
                 if parent:
                     edge = (parent, measure_name)
-                    if edge not in self.unique_edges:
-                        self.unique_edges.add(edge)
-                        self.edges.append({'from': parent, 'to': measure_name})
+                    edge_counts[edge] = edge_counts.get(edge, 0) + 1
+
+    def _publish(self):
+        """Rebuild the public node/edge lists from the row columns and counts."""
+        # Later rows win for duplicate measure names, as in measure_data
+        self._measure_rows = {measure_name: row for row, measure_name in enumerate(self._row_names)}
+
+        self.measure_data = {}
+        for measure_name, row in self._measure_rows.items():
+            # Cache the measure data for later use
+            self.measure_data[measure_name] = {
+                'parent_measures': self._row_parents[row],
+                'child_measures': self._row_children[row],
+                'columns': self._row_columns[row]
+            }
+
+        self.nodes = [{'id': measure_name, 'label': measure_name} for measure_name in self._row_names]
+        self.nodes.extend({'id': column, 'label': column, 'type': 'column'} for column in self._column_counts)
+        self.edges = [{'from': source, 'to': target} for source, target in self._edge_counts]
+        self.unique_edges = set(self._edge_counts)
+        self.unique_columns = set(self._column_counts)
+        self.measures_with_children = set(self._child_counts)
+
+    def process_lineage_data(self):
+        if self._processed:
+            return
+
+        with open(self.tsv_file_path, 'rb') as file:
+            # Process lineage data here; rows are indexed as they are read
+            for start, end, raw in self._split_rows(file):
+                row_hash = hashlib.sha256(raw).digest()
+                self._append_row(start, end, row_hash, self._split_measure(self._parse_row(raw)))
+
+        self._count_rows()
+        self._publish()
+        self._processed = True
+
+    def _append_row(self, start, end, row_hash, columns):
+        measure_name, parent_measures, child_measures, measure_columns = columns
+        self._row_offsets.append(start)
+        self._row_offsets.append(end)
+        self._row_hashes.append(row_hash)
+        self._row_names.append(measure_name)
+        self._row_parents.append(parent_measures)
+        self._row_children.append(child_measures)
+        self._row_columns.append(measure_columns)
+
+    def refreshed(self):
+        """
+        Return a LineageView for the file as it is on disk now, re-parsing only
+        the rows whose bytes changed since this one was loaded.
+
+        Only the CSV parse of unchanged rows is skipped: every row is still read
+        and hashed, and the nodes, edges and counts are rebuilt from the rows in
+        file order, so they are identical to a fresh parse. The measure graph
+        (with its cycles, levels and reachability index) and the diagram
+        layout are reused only when no row's measure, parents, children or
+        columns changed, e.g. after an edit to DAX alone. This view is left untouched, so readers still
+        holding it are unaffected.
+
+        Returns:
+        LineageView: The up-to-date view
+        """
+        if not self._processed:
+            self.process_lineage_data()
+
+        refreshed = LineageView(self.tsv_file_path, self.reachability_max_bytes)
+        old_rows = {}
+        for row, row_hash in enumerate(self._row_hashes):
+            old_rows.setdefault(row_hash, []).append(row)
+
+        added_rows = []
+        with open(self.tsv_file_path, 'rb') as file:
+            for start, end, raw in self._split_rows(file):
+                row_hash = hashlib.sha256(raw).digest()
+                matches = old_rows.get(row_hash)
+                if matches:
+                    old_row = matches.pop()
+                    columns = self._row(old_row)
+                else:
+                    added_rows.append(len(refreshed._row_names))
+                    columns = self._split_measure(self._parse_row(raw))
+                refreshed._append_row(start, end, row_hash, columns)
+
+        removed_rows = [row for rows in old_rows.values() for row in rows]
+
+        refreshed._count_rows()
+        refreshed._publish()
+
+        if (refreshed._row_names, refreshed._row_parents, refreshed._row_children, refreshed._row_columns) == \
+                (self._row_names, self._row_parents, self._row_children, self._row_columns):
+            # Same lineage in the same order: the graph, its indexes and the
+            # layout still hold
+            refreshed._graph = self._graph
+            refreshed._reachability = self._reachability
+            if self._layout is not None:
+                refreshed._set_layout(self._layout)
+
+        # The measure sets only depend on names and on whether rows have children
+        if sorted((self._row_names[row], bool(self._row_children[row])) for row in removed_rows) == \
+                sorted((refreshed._row_names[row], bool(refreshed._row_children[row])) for row in added_rows):
+            refreshed._all_measures = self._all_measures
+            refreshed._final_measures = self._final_measures
+        refreshed._processed = True
+        return refreshed
 
     def extract_dax_expressions(self):
         dax_expressions = []
-        for measure in self.nodes:
-            if 'label' in measure and measure.get('type') != 'column':
-                label = measure['label'].strip()
-                if label:
-                    dax_expression = measure['dax']
-                    if dax_expression:
-                        # Replace escape sequences with their corresponding characters
-                        dax_expression = dax_expression.replace('\\n', '\n')
-                        dax_expression = dax_expression.replace('\\t', '\t')
-                        dax_expression = dax_expression.replace('\\r', '\r')
-                        dax_expressions.append((label, dax_expression))
+        rows = [row for row, name in enumerate(self._row_names) if name.strip()]
+        for row, dax_expression in self._read_dax(rows):
+            if dax_expression:
+                dax_expressions.append((self._row_names[row].strip(), _unescape_dax(dax_expression)))
         return dax_expressions
 
-    def get_all_measures(self):
+    def measure_graph(self):
         """
-        Get all measures from the lineage data.
+        The lineage as a MeasureGraph (integer IDs, CSR adjacency), built on
+        first use. All traversals below run on it.
         """
-        all_measures = set()
-        
-        with open(self.tsv_file_path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file, delimiter='\t')
-            next(reader)  # Skip the header row
-            
-            for measure in reader:
-                measure_name = measure[self.MEASURE_INDEX]
-                all_measures.add(measure_name)
-        
-        return all_measures
+        self.process_lineage_data()
+        if self._graph is None:
+            self._graph = MeasureGraph.from_measure_data(self.measure_data)
+        return self._graph
 
-    def expand_used_measures(self, used_measures):
+    def layout(self, timeout=None):
         """
-        Expand a set of measures used in visuals to include all upstream dependencies.
+        Get the layered layout of the lineage diagram. It is computed once per
+        TSV version in a background thread, started by the first call, unless
+        it was restored from the snapshot.
+
+        Parameters:
+        timeout (float): Seconds to wait for the layout; None waits until it is done
+
+        Returns:
+        LayeredLayout or None: The layout, or None if it is not ready in time
         """
-        if not self.measure_data:
-            self.process_lineage_data()
+        with self._layout_lock:
+            if not self._layout_started:
+                self._layout_started = True
+                threading.Thread(target=self._compute_layout, name='lineage-layout', daemon=True).start()
+        self._layout_done.wait(timeout)
+        return self._layout
+
+    def _compute_layout(self):
+        try:
+            self._layout = LayeredLayout(self.nodes, self.edges, self.get_measure_levels())
+        except Exception as e:
+            print(f"Error laying out the lineage diagram: {e}")
+        finally:
+            self._layout_done.set()
+
+    def _set_layout(self, layout):
+        self._layout = layout
+        self._layout_started = True
+        self._layout_done.set()
+
+    def reachability_index(self):
+        """
+        The ReachabilityIndex of this TSV version, built on first use. Above
+        ``reachability_max_bytes`` (0 disables it) queries walk the graph.
+        """
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self.measure_graph(), self.reachability_max_bytes)
+        return self._reachability
 
-        expanded = set()
-        stack = list(used_measures or [])
+    def get_cycles(self):
+        """
+        Get the circular dependencies in the lineage. The measures of a
+        cycle count as one node for the ordering and levels below.
 
-        while stack:
-            measure = stack.pop()
-            if not measure or measure in expanded:
-                continue
+        Returns:
+        list: One list of measure names per cycle
+        """
+        graph = self.measure_graph()
+        return [graph.names_of(members) for members in graph.cycles()]
 
-            expanded.add(measure)
-            data = self.measure_data.get(measure)
-            if not data:
-                continue
+    def get_topological_order(self):
+        """
+        Get all measures ordered so that every measure comes after the
+        measures it depends on (cycles excepted).
 
-            for parent in data.get('parent_measures', []):
-                parent = (parent or '').strip()
-                if parent and parent not in expanded:
-                    stack.append(parent)
+        Returns:
+        list: Measure names, parents first
+        """
+        graph = self.measure_graph()
+        return graph.names_of(graph.condensation().order)
 
-        return expanded
+    def get_measure_levels(self):
+        """
+        Get the dependency level of every measure: 0 without parent measures,
+        otherwise one more than its deepest parent. Measures on a cycle share
+        a level. Computed once per TSV version.
 
-    def get_final_measures(self):
+        Returns:
+        dict: Measure name -> level
         """
-        Get only final measures (measures with no children).
+        graph = self.measure_graph()
+        return dict(zip(graph.names, graph.condensation().node_levels))
+
+    def get_upstream_measures(self, measure_name):
         """
-        final_measures = set()
-        parent_measures = set()
+        Get every measure the given measure depends on, directly or indirectly.
 
-        with open(self.tsv_file_path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file, delimiter='\t')
-            next(reader)  # Skip the header row
+        Parameters:
+        measure_name (str): Name of the measure
 
-            for measure in reader:
-                measure_name = measure[self.MEASURE_INDEX]
-                child_measures = measure[self.CHILD_INDEX].split(
-                    '; ') if measure[self.CHILD_INDEX] else []
+        Returns:
+        set: Names of the upstream measures
+        """
+        graph = self.measure_graph()
+        return set(graph.names_of(self.reachability_index().ancestors(graph.ids_of([measure_name]))))
 
-                # Add to final_measures if it has no children
-                if not child_measures:
-                    final_measures.add(measure_name)
+    def get_downstream_measures(self, measure_name):
+        """
+        Get every measure that depends on the given measure, directly or indirectly.
+
+        Parameters:
+        measure_name (str): Name of the measure
+
+        Returns:
+        set: Names of the downstream measures
+        """
+        graph = self.measure_graph()
+        return set(graph.names_of(self.reachability_index().descendants(graph.ids_of([measure_name]))))
+
+    def is_upstream(self, upstream_name, measure_name):
+        """
+        Check whether ``measure_name`` depends on ``upstream_name``, directly or indirectly.
+        """
+        graph = self.measure_graph()
+        upstream = graph.id_of(upstream_name)
+        measure = graph.id_of(measure_name)
+        if upstream is None or measure is None:
+            return False
+        return self.reachability_index().is_ancestor(upstream, measure)
+
+    def get_all_measures(self):
+        """
+        Get all measures from the lineage data.
+        """
+        self.process_lineage_data()
+        if self._all_measures is None:
+            self._all_measures = frozenset(self._row_names)
+        return set(self._all_measures)
+
+    def expand_used_measures(self, used_measures):
+        """
+        Expand a set of measures used in visuals to include all upstream dependencies.
+        """
+        graph = self.measure_graph()
+        used_measures = [measure for measure in (used_measures or []) if measure]
+
+        expanded = set(used_measures)
+        expanded.update(graph.names_of(self.reachability_index().ancestors(graph.ids_of(used_measures))))
+        return expanded
 
-                # Track all measures that are parents
+    def get_final_measures(self):
+        """
+        Get only final measures (measures with no children).
+        """
+        self.process_lineage_data()
+        if self._final_measures is None:
+            final_measures = set()
+            parent_measures = set()
+            for measure_name, child_measures in zip(self._row_names, self._row_children):
+                # Add to final_measures if it has no children, otherwise track it as a parent
                 if child_measures:
                     parent_measures.add(measure_name)
+                else:
+                    final_measures.add(measure_name)
 
-        # A measure is final if it's in final_measures and not a parent
-        return final_measures - parent_measures
+            # A measure is final if it's in final_measures and not a parent
+            self._final_measures = frozenset(final_measures - parent_measures)
+        return set(self._final_measures)
 
     def get_measure_dependencies(self, measure_name):
         """
@@ -174,8 +540,7 @@ class LineageView:
         dict: Dictionary with 'parent_measures', 'child_measures', and 'type'
         """
         # Process data first if not already done
-        if not self.measure_data:
-            self.process_lineage_data()
+        self.process_lineage_data()
             
         # Get the data from our cache if available
         if measure_name in self.measure_data:
@@ -231,47 +596,99 @@ class LineageView:
         Returns:
         dict: Full dependency graph with all related measures
         """
-        # Process data first if not already done
-        if not self.measure_data:
-            self.process_lineage_data()
-            
+        graph = self.measure_graph()
+
         # Initialize with the starting measures
         all_measures = set(measure_names)
         dependency_data = {}
-        
+
         # First pass: collect all related measures (breadth-first)
-        measures_to_process = list(measure_names)
-        processed = set()
-        
-        while measures_to_process:
-            current_measure = measures_to_process.pop(0)
-            
-            if current_measure in processed:
-                continue
-                
-            processed.add(current_measure)
-            
-            if current_measure in self.measure_data:
-                data = self.measure_data[current_measure]
-                
-                # Add parents to the processing queue
-                for parent in data['parent_measures']:
-                    if parent and parent not in processed:
-                        all_measures.add(parent)
-                        measures_to_process.append(parent)
-                
-                # Add children to the processing queue
-                for child in data['child_measures']:
-                    if child and child not in processed:
-                        all_measures.add(child)
-                        measures_to_process.append(child)
-        
+        related = graph.reachable(graph.ids_of(measure_names), parents=True, children=True)
+        all_measures.update(graph.names_of(related))
+
         # Second pass: get dependency data for all collected measures
         for measure in all_measures:
             dependency_data[measure] = self.get_measure_dependencies(measure)
             
         return dependency_data
 
+    def get_dependency_subgraph(self, measure_names, depth_up=1, depth_down=1, max_nodes=None,
+                                cursor=0, limit=None):
+        """
+        Get the neighbourhood of some measures as nodes and edges, one page at a time.
+
+        Measures up to depth_up parent links and depth_down child links away
+        are listed nearest first, followed by the columns feeding the start
+        measures and the upstream measures within depth_up - 1. Nodes have the
+        shape of self.nodes plus a signed 'level' (negative upstream) and
+        edges the shape of self.edges. Each edge comes with the page holding
+        the later of its two nodes, so after loading a page every edge between
+        loaded nodes is known.
+
+        Parameters:
+        measure_names (list): Measures to start from; unknown names are ignored
+        depth_up (int): Number of parent links to follow
+        depth_down (int): Number of child links to follow
+        max_nodes (int): Optional cap on the number of nodes in the neighbourhood
+        cursor (int): Position of the first node of the page
+        limit (int): Optional number of nodes per page (default: all)
+
+        Returns:
+        dict: 'nodes' and 'edges' of the page, 'total_nodes' in the
+            neighbourhood, 'truncated' when max_nodes left nodes out, and
+            'next_cursor' (None on the last page)
+        """
+        graph = self.measure_graph()
+        order, levels, truncated = graph.neighbourhood(
+            graph.ids_of(measure_names), depth_up, depth_down, max_nodes)
+
+        nodes = [{'id': name, 'label': name, 'level': level}
+                 for name, level in zip(graph.names_of(order), levels)]
+        positions = {node: position for position, node in enumerate(order)}
+
+        # Columns feed a measure from one level further up
+        column_positions = {}
+        for node, level in zip(order, levels):
+            if node >= graph.measure_count or not -depth_up < level <= 0:
+                continue
+            for column in self.measure_data[graph.names[node]]['columns']:
+                if not column or column in column_positions:
+                    continue
+                if max_nodes is not None and len(nodes) >= max_nodes:
+                    truncated = True
+                    break
+                column_positions[column] = len(nodes)
+                nodes.append({'id': column, 'label': column, 'type': 'column', 'level': level - 1})
+
+        total_nodes = len(nodes)
+        start = min(cursor, total_nodes)
+        end = total_nodes if limit is None else min(start + limit, total_nodes)
+
+        # An edge belongs to the page of its later node, so only nodes before
+        # the end of the page can have edges on it
+        edges = []
+        for node in order[:end]:
+            if node >= graph.measure_count:
+                continue
+            position = positions[node]
+            measure_name = graph.names[node]
+            for parent in dict.fromkeys(graph.parents(node)):
+                parent_position = positions.get(parent)
+                if parent_position is not None and start <= max(parent_position, position) < end:
+                    edges.append({'from': graph.names[parent], 'to': measure_name})
+            for column in dict.fromkeys(self.measure_data[measure_name]['columns']):
+                column_position = column_positions.get(column)
+                if column_position is not None and start <= max(column_position, position) < end:
+                    edges.append({'from': column, 'to': measure_name})
+
+        return {
+            'nodes': nodes[start:end],
+            'edges': edges,
+            'total_nodes': total_nodes,
+            'truncated': truncated,
+            'next_cursor': end if end < total_nodes else None
+        }
+
     def get_comprehensive_unused_measures(self, used_measures_set):
         """
         Get ALL measures that would be safe to remove, including measures that
@@ -289,8 +706,7 @@ class LineageView:
             - impact_analysis: Details about each measure's impact
         """
         # Process data first if not already done
-        if not self.measure_data:
-            self.process_lineage_data()
+        self.process_lineage_data()
 
         used_measures_set = self.expand_used_measures(used_measures_set)
         all_measures = self.get_all_measures()
@@ -298,44 +714,55 @@ class LineageView:
         # Start with measures not used in any visuals
         unused_measures = all_measures - used_measures_set
 
-        # Build a reverse dependency map (child -> parents)
-        child_to_parents = {}
-        for measure_name, data in self.measure_data.items():
-            for child in data['child_measures']:
-                if child:
-                    if child not in child_to_parents:
-                        child_to_parents[child] = set()
-                    child_to_parents[child].add(measure_name)
-        
+        graph = self.measure_graph()
+        unused_nodes = graph.ids_of(unused_measures)
+        all_unused_mask = graph.mask(unused_nodes)
+        used_mask = graph.mask(graph.ids_of(used_measures_set))
+
+        # Count, for every measure that could still become unused, the
+        # children that are not unused yet. Counts drop as measures are marked
+        # unused, so checking a parent is O(1) instead of a rescan of its
+        # child list and the whole cascade visits each child link a constant
+        # number of times.
+        offsets = graph.child_offsets
+        live_children = {
+            node: offsets[node + 1] - offsets[node]
+            for node in range(graph.measure_count)
+            if offsets[node] != offsets[node + 1] and not all_unused_mask[node] and not used_mask[node]
+        }
+        if live_children:
+            for unused_node in unused_nodes:
+                for parent in graph.child_owners(unused_node):
+                    if parent in live_children:
+                        live_children[parent] -= 1
+
         # Iteratively find all measures that would become unused
         deletion_chain = []
-        all_unused = set(unused_measures)
-        measures_to_check = list(unused_measures)
-        
+        measures_to_check = unused_nodes
+
         while measures_to_check:
-            current_unused = set(measures_to_check)
+            current_unused = measures_to_check
             measures_to_check = []
-            
-            for unused_measure in current_unused:
-                # Check all parents of this unused measure
-                if unused_measure in child_to_parents:
-                    for parent in child_to_parents[unused_measure]:
-                        if parent not in all_unused and parent not in used_measures_set:
-                            # Check if ALL children of this parent are unused
-                            parent_data = self.measure_data.get(parent, {})
-                            children = parent_data.get('child_measures', [])
-                            
-                            # Filter out empty strings
-                            children = [c for c in children if c]
-                            
-                            if children and all(child in all_unused for child in children):
-                                # This parent would become unused after removing its children
-                                all_unused.add(parent)
-                                measures_to_check.append(parent)
-            
-            if current_unused:
-                deletion_chain.append(list(current_unused))
-        
+
+            if live_children:
+                for unused_node in current_unused:
+                    # Check every measure listing this unused measure as a child
+                    for parent in graph.child_owners(unused_node):
+                        if live_children.get(parent) == 0:
+                            # All children of this parent are unused, so it would
+                            # become unused after removing them
+                            del live_children[parent]
+                            measures_to_check.append(parent)
+                            for owner in graph.child_owners(parent):
+                                if owner in live_children:
+                                    live_children[owner] -= 1
+
+            deletion_chain.append(graph.names_of(current_unused))
+
+        all_unused = set(unused_measures)
+        for chain_level in deletion_chain[1:]:
+            all_unused.update(chain_level)
+
         # Build impact analysis
         impact_analysis = {}
         for measure in all_unused:
@@ -381,92 +808,59 @@ class LineageView:
         else:
             return "isolated"
 
-    def analyze_deletion_impact(self, measure_names):
+    def analyze_deletion_impact(self, measure_names, max_depth=None):
         """
         Analyze what happens if we delete these measures.
-        
+
+        Level 1 holds the selected measures; each following level holds the
+        measures whose parent measures would all be gone once the previous
+        levels are deleted. Levels are found in one pass over the dependency
+        graph by counting, for every affected measure, the parents still left.
+
         Parameters:
         measure_names (list): List of measure names to consider for deletion
-        
+        max_depth (int): Optional number of levels to compute, counting the
+            selected measures as level 1 (default: all levels)
+
         Returns:
-        dict: Deletion analysis with chains and impact
+        dict: Deletion analysis with chains and impact. The chain always has
+            the keys level1 to level3 and one more key per deeper level found.
         """
-        # Process data first if not already done
-        if not self.measure_data:
-            self.process_lineage_data()
-            
-        # Start with the selected measures as level 1
-        chain = {
-            "level1": list(measure_names),
-            "level2": [],
-            "level3": []
-        }
-        
-        # Collect all measures that reference our level 1 measures
-        level2_candidates = set()
-        
-        for measure in self.measure_data:
-            data = self.measure_data[measure]
-            
-            # Skip if this is in our level 1
-            if measure in measure_names:
-                continue
-                
-            # Check if this measure depends on any level 1 measure
-            for parent in data['parent_measures']:
-                if parent in measure_names:
-                    level2_candidates.add(measure)
-                    break
-        
-        # Filter level 2 candidates - only include ones where ALL parents are in level 1
-        for candidate in level2_candidates:
-            data = self.measure_data[candidate]
-            all_parents_in_level1 = True
-            
-            for parent in data['parent_measures']:
-                if parent not in measure_names:
-                    all_parents_in_level1 = False
-                    break
-                    
-            if all_parents_in_level1:
-                chain["level2"].append(candidate)
-        
-        # Now similarly for level 3 - measures that depend only on level 1 and level 2
-        level3_candidates = set()
-        
-        for measure in self.measure_data:
-            data = self.measure_data[measure]
-            
-            # Skip if already in level 1 or 2
-            if measure in measure_names or measure in chain["level2"]:
-                continue
-                
-            # Check if this measure depends on any level 2 measure
-            for parent in data['parent_measures']:
-                if parent in chain["level2"]:
-                    level3_candidates.add(measure)
-                    break
-        
-        # Filter level 3 candidates - only include ones where ALL parents are in level 1 or 2
-        all_previous_levels = set(measure_names) | set(chain["level2"])
-        
-        for candidate in level3_candidates:
-            data = self.measure_data[candidate]
-            all_parents_in_previous_levels = True
-            
-            for parent in data['parent_measures']:
-                if parent not in all_previous_levels:
-                    all_parents_in_previous_levels = False
-                    break
-                    
-            if all_parents_in_previous_levels:
-                chain["level3"].append(candidate)
-        
-        # Calculate impact score - more complex formulas could be used
-        impact_score = len(chain["level1"]) + len(chain["level2"])*2 + len(chain["level3"])*3
-        
+        graph = self.measure_graph()
+        frontier = graph.ids_of(set(measure_names))
+        deleted = graph.mask(frontier)
+        remaining_parents = {}
+
+        levels = [list(measure_names)]
+        while frontier and (max_depth is None or len(levels) < max_depth):
+            next_level = []
+            for node in frontier:
+                for dependent in graph.dependents(node):
+                    if deleted[dependent]:
+                        continue
+                    count = remaining_parents.get(dependent)
+                    if count is None:
+                        count = len(graph.parents(dependent))
+                    count -= 1
+                    remaining_parents[dependent] = count
+                    if not count:
+                        # Every parent of this measure is deleted by now
+                        deleted[dependent] = 1
+                        next_level.append(dependent)
+            if not next_level:
+                break
+            levels.append(graph.names_of(next_level))
+            frontier = next_level
+
+        while len(levels) < 3:
+            levels.append([])
+        chain = {f"level{depth}": level for depth, level in enumerate(levels, 1)}
+
+        # Calculate impact score - measures deeper in the chain weigh more
+        impact_score = sum(depth * len(level) for depth, level in enumerate(levels, 1))
+
         return {
             "chain": chain,
             "impact_score": impact_score,
-            "total_measures": len(chain["level1"]) + len(chain["level2"]) + len(chain["level3"])
+            "total_measures": sum(len(level) for level in levels)
         }
\ No newline at end of file
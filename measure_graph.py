@@ -0,0 +1,517 @@
+import itertools
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+def _to_csr(adjacency: Sequence[Sequence[int]]) -> Tuple[array, array]:
+    """Pack per-node neighbour lists into CSR offset and index arrays."""
+    # accumulate() only takes initial= from Python 3.8
+    offsets = array('l', [0])
+    offsets.extend(itertools.accumulate(map(len, adjacency)))
+    index = array('l', itertools.chain.from_iterable(adjacency))
+    return offsets, index
+
+
+def _transpose(offsets: array, index: array, size: int) -> Tuple[array, array]:
+    """CSR of the reversed edges, neighbours kept in ascending source order."""
+    # Counting sort of the edges by target: sources are visited in order, so
+    # every reversed neighbour list comes out sorted
+    counts = [0] * size
+    for target in index:
+        counts[target] += 1
+    reversed_offsets = array('l', [0])
+    reversed_offsets.extend(itertools.accumulate(counts))
+    positions = list(reversed_offsets[:-1])
+    reversed_index = array('l', bytes(len(index) * array('l').itemsize))
+    for source in range(size):
+        for target in index[offsets[source]:offsets[source + 1]]:
+            reversed_index[positions[target]] = source
+            positions[target] += 1
+    return reversed_offsets, reversed_index
+
+
+class MeasureGraph:
+    """
+    Measure lineage with dense integer IDs and CSR adjacency.
+
+    Every measure, and every name referenced in a parent or child list, gets
+    an ID. References are resolved to IDs once here (by exact name, else by
+    stripped name) instead of being stripped and hashed at every step.
+    Measures come first, so ``node < measure_count`` tells measures apart
+    from referenced names that have no row of their own. Parents and children
+    are kept as written in the ParentMeasures and ChildMeasures columns, each
+    as an offsets array (one entry per node plus one) and an index array of
+    neighbour IDs.
+    """
+
+    def __init__(self, names: List[str], measure_count: int,
+                 parent_offsets: array, parent_index: array,
+                 child_offsets: array, child_index: array) -> None:
+        self.names = names
+        self.measure_count = measure_count
+        self.ids: Dict[str, int] = {name: node for node, name in enumerate(names)}
+        self.parent_offsets = parent_offsets
+        self.parent_index = parent_index
+        self.child_offsets = child_offsets
+        self.child_index = child_index
+        self._owner_csr: Optional[Tuple[array, array]] = None
+        self._dependent_csr: Optional[Tuple[array, array]] = None
+        self._components: Optional[Tuple[array, int]] = None
+        self._condensation: Optional['Condensation'] = None
+
+    @classmethod
+    def from_measure_data(cls, measure_data: Mapping[str, Mapping[str, Any]]) -> 'MeasureGraph':
+        names = list(measure_data)
+        ids = {name: node for node, name in enumerate(names)}
+
+        def node_ids(references: List[str]) -> List[int]:
+            try:
+                return [ids[reference] for reference in references if reference]
+            except KeyError:
+                pass
+            nodes = []
+            for reference in references:
+                node = ids.get(reference) if reference else None
+                if node is None:
+                    reference = (reference or '').strip()
+                    if not reference:
+                        continue
+                    node = ids.get(reference)
+                    if node is None:
+                        node = ids[reference] = len(names)
+                        names.append(reference)
+                nodes.append(node)
+            return nodes
+
+        parents = [node_ids(data.get('parent_measures', [])) for data in measure_data.values()]
+        children = [node_ids(data.get('child_measures', [])) for data in measure_data.values()]
+        # Referenced names without a row of their own have no neighbours
+        padding = [[] for _ in range(len(names) - len(parents))]
+        return cls(names, len(measure_data), *_to_csr(parents + padding), *_to_csr(children + padding))
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def ids_of(self, names: Iterable[str]) -> List[int]:
+        """IDs of the given names, skipping names that are not in the graph."""
+        ids = self.ids
+        return [ids[name] for name in names if name in ids]
+
+    def names_of(self, nodes: Iterable[int]) -> List[str]:
+        names = self.names
+        return [names[node] for node in nodes]
+
+    def parents(self, node: int) -> array:
+        return self.parent_index[self.parent_offsets[node]:self.parent_offsets[node + 1]]
+
+    def children(self, node: int) -> array:
+        return self.child_index[self.child_offsets[node]:self.child_offsets[node + 1]]
+
+    def child_owners(self, node: int) -> array:
+        """Measures whose ChildMeasures list contains ``node``."""
+        if self._owner_csr is None:
+            self._owner_csr = _transpose(self.child_offsets, self.child_index, self.size)
+        offsets, index = self._owner_csr
+        return index[offsets[node]:offsets[node + 1]]
+
+    def dependents(self, node: int) -> array:
+        """Measures whose ParentMeasures list contains ``node``."""
+        if self._dependent_csr is None:
+            self._dependent_csr = _transpose(self.parent_offsets, self.parent_index, self.size)
+        offsets, index = self._dependent_csr
+        return index[offsets[node]:offsets[node + 1]]
+
+    def components(self) -> Tuple[array, int]:
+        """
+        Strongly connected components over the parent links (iterative
+        Tarjan). Returns the component of every node and the component count.
+        Components are numbered in the order Tarjan completes them, so every
+        component's parents have lower numbers than the component itself.
+        """
+        if self._components is not None:
+            return self._components
+
+        size = self.size
+        offsets, index = self.parent_offsets, self.parent_index
+        discovery = array('l', [-1]) * size
+        low = array('l', [0]) * size
+        component = array('l', [-1]) * size
+        on_stack = bytearray(size)
+        stack: List[int] = []
+        counter = 0
+        count = 0
+        for root in range(size):
+            if discovery[root] != -1:
+                continue
+            discovery[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            while work:
+                frame = work[-1]
+                node, edge = frame
+                if edge < offsets[node + 1]:
+                    frame[1] = edge + 1
+                    target = index[edge]
+                    if discovery[target] == -1:
+                        discovery[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append([target, offsets[target]])
+                    elif on_stack[target] and discovery[target] < low[node]:
+                        low[node] = discovery[target]
+                    continue
+
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+                if low[node] == discovery[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = count
+                        if member == node:
+                            break
+                    count += 1
+
+        self._components = (component, count)
+        return self._components
+
+    def condensation(self) -> 'Condensation':
+        """The parent links with every dependency cycle collapsed (cached)."""
+        if self._condensation is None:
+            self._condensation = Condensation(self)
+        return self._condensation
+
+    def cycles(self) -> List[List[int]]:
+        """Nodes of every dependency cycle, one list per strongly connected component."""
+        condensation = self.condensation()
+        return [members for source, members in enumerate(condensation.members) if condensation.cyclic[source]]
+
+    def mask(self, nodes: Iterable[int]) -> bytearray:
+        marks = bytearray(self.size)
+        for node in nodes:
+            marks[node] = 1
+        return marks
+
+    def reachable(self, start: Iterable[int], parents: bool = True, children: bool = False) -> List[int]:
+        """
+        Nodes reachable from ``start`` (included) following parent and/or
+        child links, in breadth-first order.
+        """
+        seen = bytearray(self.size)
+        order = []
+        for node in start:
+            if not seen[node]:
+                seen[node] = 1
+                order.append(node)
+
+        parent_offsets, parent_index = self.parent_offsets, self.parent_index
+        child_offsets, child_index = self.child_offsets, self.child_index
+        position = 0
+        while position < len(order):
+            node = order[position]
+            position += 1
+            if parents:
+                for neighbour in parent_index[parent_offsets[node]:parent_offsets[node + 1]]:
+                    if not seen[neighbour]:
+                        seen[neighbour] = 1
+                        order.append(neighbour)
+            if children:
+                for neighbour in child_index[child_offsets[node]:child_offsets[node + 1]]:
+                    if not seen[neighbour]:
+                        seen[neighbour] = 1
+                        order.append(neighbour)
+        return order
+
+    def neighbourhood(self, start: Iterable[int], depth_up: int, depth_down: int,
+                      max_nodes: Optional[int] = None) -> Tuple[List[int], List[int], bool]:
+        """
+        Nodes within ``depth_up`` parent links or ``depth_down`` child links
+        of ``start``, nearest first, with their signed distance (negative
+        upstream, 0 for ``start``). A node reached both ways keeps the
+        distance it was first found at.
+
+        Both directions share one breadth-first queue, so stopping at
+        ``max_nodes`` keeps the closest nodes on each side. The flag is True
+        when nodes were left out because of that cap.
+        """
+        levels: Dict[int, int] = {}
+        up_seen = bytearray(self.size)
+        down_seen = bytearray(self.size)
+        queue = deque()
+        for node in start:
+            if node not in levels:
+                if max_nodes is not None and len(levels) >= max_nodes:
+                    return list(levels), list(levels.values()), True
+                levels[node] = 0
+                up_seen[node] = down_seen[node] = 1
+                queue.append((node, 0, True))
+                queue.append((node, 0, False))
+
+        while queue:
+            node, distance, upstream = queue.popleft()
+            if upstream:
+                if distance >= depth_up:
+                    continue
+                offsets, index, seen, level = self.parent_offsets, self.parent_index, up_seen, -distance - 1
+            else:
+                if distance >= depth_down:
+                    continue
+                offsets, index, seen, level = self.child_offsets, self.child_index, down_seen, distance + 1
+            for neighbour in index[offsets[node]:offsets[node + 1]]:
+                if seen[neighbour]:
+                    continue
+                if neighbour not in levels:
+                    if max_nodes is not None and len(levels) >= max_nodes:
+                        return list(levels), list(levels.values()), True
+                    levels[neighbour] = level
+                seen[neighbour] = 1
+                queue.append((neighbour, distance + 1, upstream))
+        return list(levels), list(levels.values()), False
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the adjacency arrays (the name table excluded)."""
+        arrays = [self.parent_offsets, self.parent_index, self.child_offsets, self.child_index]
+        for transposed in (self._owner_csr, self._dependent_csr):
+            if transposed is not None:
+                arrays.extend(transposed)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+
+class Condensation:
+    """
+    The parent links of a MeasureGraph with every strongly connected
+    component collapsed to one node, which turns dependency cycles into
+    single nodes of a DAG.
+
+    Components are numbered parents first (see ``MeasureGraph.components``),
+    so ``range(count)`` is a topological order and ``order`` lists the nodes
+    the same way. A component's level is the length of its longest chain of
+    parent components, 0 when it has none; ``node_levels`` holds it per node.
+    """
+
+    def __init__(self, graph: MeasureGraph) -> None:
+        self.component, self.count = graph.components()
+        component = self.component
+
+        self.members: List[List[int]] = [[] for _ in range(self.count)]
+        for node in range(graph.size):
+            self.members[component[node]].append(node)
+
+        # Parent components of each component, and which components are cycles
+        offsets, index = graph.parent_offsets, graph.parent_index
+        self.parents: List[List[int]] = []
+        self.cyclic = bytearray(self.count)
+        self.levels = array('l', bytes(self.count * array('l').itemsize))
+        levels = self.levels
+        for source, members in enumerate(self.members):
+            parents = [component[parent] for node in members for parent in index[offsets[node]:offsets[node + 1]]]
+            if len(parents) > 1:
+                parents = list(dict.fromkeys(parents))
+            if len(members) > 1 or source in parents:
+                self.cyclic[source] = 1
+                parents = [parent for parent in parents if parent != source]
+            self.parents.append(parents)
+            if parents:
+                levels[source] = 1 + max([levels[parent] for parent in parents])
+
+        self.order = [node for members in self.members for node in members]
+        self.node_levels = array('l', [self.levels[source] for source in component])
+
+
+def _set_bits(bits: int) -> List[int]:
+    """Positions of the set bits of ``bits``, in ascending order."""
+    digits = bin(bits)[:1:-1]
+    positions = []
+    position = digits.find('1')
+    while position != -1:
+        positions.append(position)
+        position = digits.find('1', position + 1)
+    return positions
+
+
+class ReachabilityIndex:
+    """
+    Precomputed "depends on" / "depended on by" answers for a MeasureGraph.
+
+    Built over the condensation of the parent links (one node per strongly
+    connected component), in one of three modes:
+
+    - ``interval``: every component has at most one parent component (the
+      lineage is a forest). Descendants get consecutive DFS preorder numbers,
+      so "is X upstream of Y" is two comparisons and a descendant set is a
+      slice.
+    - ``bitset``: each component keeps its ancestor and descendant
+      components as a bitset (a Python int), so a set query costs
+      O(components / 64) word operations.
+    - ``bfs``: the bitsets would need more than ``max_bytes`` (or it is 0);
+      queries walk the graph instead, as before the index existed.
+
+    Ancestors follow the ParentMeasures column, descendants its reverse.
+    A node is only its own ancestor when it sits on a cycle.
+    """
+
+    def __init__(self, graph: MeasureGraph, max_bytes: int) -> None:
+        self.graph = graph
+        # Components, their parents and cycles are shared with other analyses
+        condensation = graph.condensation()
+        self.component, self.component_count = condensation.component, condensation.count
+        count = self.component_count
+        self.members = condensation.members
+        self.component_parents = condensation.parents
+        self.cyclic = condensation.cyclic
+
+        self.max_bytes = max_bytes
+        self.estimated_bytes = self.estimate_bytes(count)
+        self._ancestor_bits: List[int] = []
+        self._descendant_bits: List[int] = []
+        if max_bytes <= 0:
+            self.mode = 'bfs'
+        elif all(len(parents) <= 1 for parents in self.component_parents):
+            self.mode = 'interval'
+            self.estimated_bytes = count * 3 * array('l').itemsize
+            self._build_intervals()
+        elif self.estimated_bytes <= max_bytes:
+            self.mode = 'bitset'
+            self._build_bitsets()
+        else:
+            self.mode = 'bfs'
+
+    @staticmethod
+    def estimate_bytes(component_count: int) -> int:
+        """Memory the bitset mode needs: two bitsets of ``component_count`` bits per component."""
+        return 2 * component_count * ((component_count + 7) // 8 + 28)
+
+    def _build_intervals(self) -> None:
+        count = self.component_count
+        children: List[List[int]] = [[] for _ in range(count)]
+        for source, parents in enumerate(self.component_parents):
+            if parents:
+                children[parents[0]].append(source)
+        self.preorder = array('l', [0]) * count
+        self.subtree_end = array('l', [0]) * count
+        self.order = array('l', [0]) * count
+        position = 0
+        for root in range(count):
+            if self.component_parents[root]:
+                continue
+            work = [(root, False)]
+            while work:
+                current, finished = work.pop()
+                if finished:
+                    self.subtree_end[current] = position
+                    continue
+                self.preorder[current] = position
+                self.order[position] = current
+                position += 1
+                work.append((current, True))
+                work.extend((child, False) for child in reversed(children[current]))
+
+    def _build_bitsets(self) -> None:
+        count = self.component_count
+        # Parents have lower component numbers, so one ascending pass
+        # completes the ancestors and one descending pass the descendants
+        ancestors = [0] * count
+        for source in range(count):
+            bits = 0
+            for parent in self.component_parents[source]:
+                bits |= ancestors[parent] | (1 << parent)
+            ancestors[source] = bits
+        descendants = [0] * count
+        for source in range(count - 1, -1, -1):
+            bits = descendants[source] | (1 << source)
+            for parent in self.component_parents[source]:
+                descendants[parent] |= bits
+        self._ancestor_bits = ancestors
+        self._descendant_bits = descendants
+
+    def _expand(self, components: Iterable[int]) -> List[int]:
+        members = self.members
+        return [node for source in components for node in members[source]]
+
+    def _closure(self, nodes: Iterable[int], upstream: bool) -> List[int]:
+        """
+        Components reached in one or more steps from the components of
+        ``nodes``; a start component is only included when it is a cycle or
+        is reached from another start component.
+        """
+        component = self.component
+        sources = {component[node] for node in nodes}
+        if self.mode == 'bitset':
+            table = self._ancestor_bits if upstream else self._descendant_bits
+            bits = 0
+            for source in sources:
+                bits |= table[source]
+                if self.cyclic[source]:
+                    bits |= 1 << source
+            return _set_bits(bits)
+
+        reached = set()
+        for source in sources:
+            if upstream:
+                current = source
+                while self.component_parents[current]:
+                    current = self.component_parents[current][0]
+                    reached.add(current)
+            else:
+                reached.update(self.order[self.preorder[source] + 1:self.subtree_end[source]])
+            if self.cyclic[source]:
+                reached.add(source)
+        return sorted(reached)
+
+    def ancestors(self, nodes: Iterable[int]) -> List[int]:
+        """Nodes the given nodes depend on, directly or indirectly."""
+        nodes = list(nodes)
+        if self.mode == 'bfs':
+            return self._walk(nodes, self.graph.parents)
+        return self._expand(self._closure(nodes, upstream=True))
+
+    def descendants(self, nodes: Iterable[int]) -> List[int]:
+        """Nodes that depend on the given nodes, directly or indirectly."""
+        nodes = list(nodes)
+        if self.mode == 'bfs':
+            return self._walk(nodes, self.graph.dependents)
+        return self._expand(self._closure(nodes, upstream=False))
+
+    def _walk(self, nodes: List[int], neighbours: Any) -> List[int]:
+        seen = bytearray(self.graph.size)
+        frontier = list(nodes)
+        reached = []
+        while frontier:
+            node = frontier.pop()
+            for neighbour in neighbours(node):
+                if not seen[neighbour]:
+                    seen[neighbour] = 1
+                    reached.append(neighbour)
+                    frontier.append(neighbour)
+        return reached
+
+    def is_ancestor(self, upstream: int, node: int) -> bool:
+        """Whether ``node`` depends on ``upstream``, directly or indirectly."""
+        source = self.component[node]
+        target = self.component[upstream]
+        if source == target:
+            return bool(self.cyclic[source])
+        if self.mode == 'bitset':
+            return bool((self._ancestor_bits[source] >> target) & 1)
+        if self.mode == 'interval':
+            return self.preorder[target] < self.preorder[source] < self.subtree_end[target]
+        return upstream in self._walk([node], self.graph.parents)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'nodes': self.graph.size,
+            'components': self.component_count,
+            'cyclic_components': sum(self.cyclic),
+            'estimated_bytes': self.estimated_bytes,
+            'max_bytes': self.max_bytes,
+        }
@@ -1,36 +1,208 @@
-﻿import json
-from typing import Any, Dict, List, Optional
+﻿import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import json_backend
+
+
+# Field order of the compact column, measure and partition tuples a table is
+# kept as until its detail is built (see _TableEntry)
+_COLUMN_FIELDS = ("name", "dataType", "formatString", "dataCategory", "summarizeBy", "description", "isHidden",
+                  "displayFolder", "annotations")
+_MEASURE_FIELDS = ("name", "expression", "formatString", "displayFolder", "description", "isHidden", "annotations")
+_PARTITION_FIELDS = ("name", "mode", "sourceType", "queryGroup")
+
+
+def _intern(value: Any) -> Any:
+    # Data types, categories and modes repeat across thousands of columns
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _annotation_pairs(annotations: Optional[List[Dict[str, Any]]]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple((annotation["name"], annotation.get("value"))
+                 for annotation in annotations or () if annotation.get("name"))
+
+
+class _TableEntry:
+    """
+    Index entry for one table. Until the detail is built on first access,
+    the table is kept as ``compact``: tuples of the fields the detail shows,
+    in the order of the ``_*_FIELDS`` names above. Partition source text is
+    not kept; the Source Explorer reads it from model.json.
+    """
+
+    __slots__ = ('name', 'is_hidden', 'column_count', 'hidden_column_count', 'measure_count',
+                 'hidden_measure_count', 'compact', 'detail')
+
+    def __init__(self, table: Dict[str, Any]) -> None:
+        columns = table.get("columns", [])
+        measures = table.get("measures", [])
+        self.name = table.get("name") or ""
+        self.is_hidden = table.get("isHidden", False)
+        self.column_count = len(columns)
+        self.hidden_column_count = sum(1 for column in columns if column.get("isHidden", False))
+        self.measure_count = len(measures)
+        self.hidden_measure_count = sum(1 for measure in measures if measure.get("isHidden", False))
+        self.compact: Optional[Tuple[Any, ...]] = (
+            table.get("description", ""),
+            _annotation_pairs(table.get("annotations")),
+            tuple((column.get("name"), _intern(column.get("dataType")), column.get("formatString"),
+                   _intern(column.get("dataCategory")), _intern(column.get("summarizeBy")),
+                   column.get("description"), column.get("isHidden", False), column.get("displayFolder"),
+                   _annotation_pairs(column.get("annotations")))
+                  for column in columns),
+            tuple((measure.get("name"), "\n".join(measure.get("expression", [])).strip(),
+                   measure.get("formatString"), measure.get("displayFolder"), measure.get("description"),
+                   measure.get("isHidden", False), _annotation_pairs(measure.get("annotations")))
+                  for measure in measures),
+            tuple((partition.get("name"), _intern(partition.get("mode")),
+                   _intern((partition.get("source") or {}).get("type")), partition.get("queryGroup"))
+                  for partition in table.get("partitions", [])),
+        )
+        self.detail: Optional[Dict[str, Any]] = None
 
 
 class ModelProcessor:
     def __init__(self, json_file_path: str) -> None:
         self.json_file_path = json_file_path
-        self._raw_model: Dict[str, Any] = {}
         self._processed = False
-        self._tables: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._entries: List[_TableEntry] = []
+        self._table_index: Dict[str, int] = {}
+        # "Table[Name]" (exact and lower-cased) -> (table position, "columns"/"measures", position)
+        self._field_index: Dict[str, Tuple[int, str, int]] = {}
+        self._field_index_lower: Dict[str, Tuple[int, str, int]] = {}
+        self._tables: Optional[List[Dict[str, Any]]] = None
+        self._measures: Optional[List[Dict[str, Any]]] = None
         self._relationships: List[Dict[str, Any]] = []
         self._roles: List[Dict[str, Any]] = []
         self._annotations: Dict[str, Any] = {}
-        self._measures: List[Dict[str, Any]] = []
 
     def load(self) -> None:
+        """
+        Parse model.json and index it. Tables are kept in compact form and
+        materialized one at a time on first access; the raw model is released.
+        """
         if self._processed:
             return
 
-        with open(self.json_file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
+        data = json_backend.load_file(self.json_file_path)
 
-        self._raw_model = data.get("model", {})
-        self._extract_annotations()
-        self._extract_tables()
-        self._extract_relationships()
-        self._extract_roles()
+        raw_model = data.get("model", {})
+        self._extract_annotations(raw_model)
+        raw_tables = raw_model.get("tables", [])
+        self._entries = [_TableEntry(table) for table in raw_tables]
+        self._build_indexes(raw_tables)
+        self._extract_relationships(raw_model)
+        self._extract_roles(raw_model)
         self._processed = True
 
+    def _build_indexes(self, raw_tables: List[Dict[str, Any]]) -> None:
+        self._table_index = {}
+        self._field_index = {}
+        self._field_index_lower = {}
+        for position, entry in enumerate(self._entries):
+            self._table_index.setdefault(entry.name.lower(), position)
+
+        # Columns before measures and later tables over earlier ones, matching
+        # the lookup map table_view used to build on every request
+        for position, table in enumerate(raw_tables):
+            table_name = (table.get("name") or "").strip()
+            if not table_name:
+                continue
+            for kind in ("columns", "measures"):
+                for item_position, item in enumerate(table.get(kind, [])):
+                    item_name = (item.get("name") or "").strip()
+                    if not item_name:
+                        continue
+                    key = f"{table_name}[{item_name}]"
+                    self._field_index[key] = (position, kind, item_position)
+                    self._field_index_lower[key.lower()] = (position, kind, item_position)
+
+    def _table_detail(self, entry: _TableEntry) -> Dict[str, Any]:
+        if entry.detail is None:
+            with self._lock:
+                if entry.detail is None:
+                    entry.detail = self._extract_table(entry)
+                    entry.compact = None
+        return entry.detail
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        self.load()
+        # Tables not materialized yet are stored in compact form
+        return {
+            "tables": [(entry.name, entry.is_hidden, entry.column_count, entry.hidden_column_count,
+                        entry.measure_count, entry.hidden_measure_count, entry.compact, entry.detail)
+                       for entry in self._entries],
+            "relationships": self._relationships,
+            "roles": self._roles,
+            "annotations": self._annotations,
+            "table_index": self._table_index,
+            "field_index": self._field_index,
+            "field_index_lower": self._field_index_lower,
+        }
+
+    @classmethod
+    def from_snapshot(cls, json_file_path: str, state: Dict[str, Any]) -> "ModelProcessor":
+        processor = cls(json_file_path)
+        entries = []
+        for values in state["tables"]:
+            entry = _TableEntry.__new__(_TableEntry)
+            for slot, value in zip(_TableEntry.__slots__, values):
+                setattr(entry, slot, value)
+            entries.append(entry)
+        processor._entries = entries
+        processor._relationships = state["relationships"]
+        processor._roles = state["roles"]
+        processor._annotations = state["annotations"]
+        processor._table_index = state["table_index"]
+        processor._field_index = state["field_index"]
+        processor._field_index_lower = state["field_index_lower"]
+        processor._processed = True
+        return processor
+
     def get_tables(self) -> List[Dict[str, Any]]:
         self.load()
+        if self._tables is None:
+            self._tables = [self._table_detail(entry) for entry in self._entries]
         return self._tables
 
+    def get_table(self, name: str) -> Optional[Dict[str, Any]]:
+        """Case-insensitive lookup of one table, materializing only that table."""
+        self.load()
+        position = self._table_index.get((name or "").lower())
+        if position is None:
+            return None
+        return self._table_detail(self._entries[position])
+
+    def find_field(self, reference: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Resolve a ``Table[Name]`` reference (exact match first, then
+        case-insensitive) to ``(table name, kind, item)`` with kind "column"
+        or "measure".
+        """
+        self.load()
+        location = self._field_index.get(reference)
+        if location is None:
+            location = self._field_index_lower.get(reference.lower())
+        if location is None:
+            return None
+        position, kind, item_position = location
+        entry = self._entries[position]
+        return entry.name.strip(), kind[:-1], self._table_detail(entry)[kind][item_position]
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Model-wide counts taken from the index, without materializing any table."""
+        self.load()
+        return {
+            "table_count": len(self._entries),
+            "column_count": sum(entry.column_count for entry in self._entries),
+            "measure_count": sum(entry.measure_count for entry in self._entries),
+            "hidden_table_count": sum(1 for entry in self._entries if entry.is_hidden),
+            "hidden_column_count": sum(entry.hidden_column_count for entry in self._entries),
+            "hidden_measure_count": sum(entry.hidden_measure_count for entry in self._entries),
+        }
+
     def get_relationships(self) -> List[Dict[str, Any]]:
         self.load()
         return self._relationships
@@ -45,10 +217,12 @@ class ModelProcessor:
 
     def get_measures(self) -> List[Dict[str, Any]]:
         self.load()
+        if self._measures is None:
+            self._measures = [measure for table in self.get_tables() for measure in table["measures"]]
         return self._measures
 
-    def _extract_annotations(self) -> None:
-        annotations = self._raw_model.get("annotations", [])
+    def _extract_annotations(self, raw_model: Dict[str, Any]) -> None:
+        annotations = raw_model.get("annotations", [])
         annotation_map: Dict[str, Any] = {}
         for annotation in annotations:
             name = annotation.get("name")
@@ -57,41 +231,31 @@ class ModelProcessor:
             annotation_map[name] = annotation.get("value")
         self._annotations = annotation_map
 
-    def _extract_tables(self) -> None:
-        tables = self._raw_model.get("tables", [])
-        extracted_tables: List[Dict[str, Any]] = []
-        all_measures: List[Dict[str, Any]] = []
-
-        for table in tables:
-            table_name = table.get("name") or ""
-            table_info: Dict[str, Any] = {
-                "name": table_name,
-                "isHidden": table.get("isHidden", False),
-                "description": table.get("description", ""),
-                "annotations": self._list_to_annotation_map(table.get("annotations", [])),
-                "columns": [],
-                "measures": [],
-                "partitions": [],
-            }
-
-            columns = table.get("columns", [])
-            table_info["columns"] = self._extract_columns(columns)
-
-            measures = table.get("measures", [])
-            extracted_measures = self._extract_measures(measures, table_name)
-            table_info["measures"] = extracted_measures
-            all_measures.extend(extracted_measures)
-
-            partitions = table.get("partitions", [])
-            table_info["partitions"] = self._extract_partitions(partitions)
+    def _extract_table(self, entry: _TableEntry) -> Dict[str, Any]:
+        description, annotations, columns, measures, partitions = entry.compact
+        measure_details = []
+        for values in measures:
+            measure = {"table": entry.name}
+            measure.update(zip(_MEASURE_FIELDS, values))
+            measure["annotations"] = dict(measure["annotations"])
+            measure_details.append(measure)
+        column_details = []
+        for values in columns:
+            column = dict(zip(_COLUMN_FIELDS, values))
+            column["annotations"] = dict(column["annotations"])
+            column_details.append(column)
+        return {
+            "name": entry.name,
+            "isHidden": entry.is_hidden,
+            "description": description,
+            "annotations": dict(annotations),
+            "columns": column_details,
+            "measures": measure_details,
+            "partitions": [dict(zip(_PARTITION_FIELDS, values)) for values in partitions],
+        }
 
-            extracted_tables.append(table_info)
-
-        self._tables = extracted_tables
-        self._measures = all_measures
-
-    def _extract_relationships(self) -> None:
-        relationships = self._raw_model.get("relationships", [])
+    def _extract_relationships(self, raw_model: Dict[str, Any]) -> None:
+        relationships = raw_model.get("relationships", [])
         extracted: List[Dict[str, Any]] = []
         for rel in relationships:
             rel_info = {
@@ -110,8 +274,8 @@ class ModelProcessor:
             extracted.append(rel_info)
         self._relationships = extracted
 
-    def _extract_roles(self) -> None:
-        roles = self._raw_model.get("roles", [])
+    def _extract_roles(self, raw_model: Dict[str, Any]) -> None:
+        roles = raw_model.get("roles", [])
         extracted_roles: List[Dict[str, Any]] = []
         for role in roles:
             role_info = {
@@ -130,57 +294,6 @@ class ModelProcessor:
             extracted_roles.append(role_info)
         self._roles = extracted_roles
 
-    def _extract_columns(self, columns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        extracted_columns: List[Dict[str, Any]] = []
-        for column in columns:
-            extracted_columns.append({
-                "name": column.get("name"),
-                "dataType": column.get("dataType"),
-                "formatString": column.get("formatString"),
-                "dataCategory": column.get("dataCategory"),
-                "summarizeBy": column.get("summarizeBy"),
-                "description": column.get("description"),
-                "isHidden": column.get("isHidden", False),
-                "displayFolder": column.get("displayFolder"),
-                "annotations": self._list_to_annotation_map(column.get("annotations", [])),
-            })
-        return extracted_columns
-
-    def _extract_measures(self, measures: List[Dict[str, Any]], table_name: Optional[str]) -> List[Dict[str, Any]]:
-        extracted_measures: List[Dict[str, Any]] = []
-        for measure in measures:
-            expression = "\n".join(measure.get("expression", []))
-            extracted_measures.append({
-                "table": table_name,
-                "name": measure.get("name"),
-                "expression": expression.strip(),
-                "formatString": measure.get("formatString"),
-                "displayFolder": measure.get("displayFolder"),
-                "description": measure.get("description"),
-                "isHidden": measure.get("isHidden", False),
-                "annotations": self._list_to_annotation_map(measure.get("annotations", [])),
-            })
-        return extracted_measures
-
-    def _extract_partitions(self, partitions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        extracted_partitions: List[Dict[str, Any]] = []
-        for partition in partitions:
-            partition_info = {
-                "name": partition.get("name"),
-                "mode": partition.get("mode"),
-                "sourceType": None,
-                "queryGroup": partition.get("queryGroup"),
-            }
-            source = partition.get("source", {})
-            if source:
-                partition_info["sourceType"] = source.get("type")
-                if source.get("type") == "m":
-                    partition_info["expression"] = "\n".join(source.get("expression", [])).strip()
-                else:
-                    partition_info["expression"] = source.get("expression")
-            extracted_partitions.append(partition_info)
-        return extracted_partitions
-
     def _list_to_annotation_map(self, annotations: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
         if not annotations:
             return {}
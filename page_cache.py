@@ -0,0 +1,92 @@
+import collections
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+
+class PageEntry:
+    __slots__ = ('version', 'body', 'mimetype', 'variants')
+
+    def __init__(self, version: str, body: bytes, mimetype: str) -> None:
+        self.version = version
+        self.body = body
+        self.mimetype = mimetype
+        # Content-Encoding -> compressed body, filled in as clients ask for them
+        self.variants: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+
+class PageCache:
+    """
+    LRU cache of rendered responses bounded by a total byte budget.
+
+    Entries are keyed by route and query string and tagged with a version (the
+    page ETag, which already covers data fingerprints and template version), so
+    a new data version replaces the old page instead of piling up next to it.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: 'collections.OrderedDict[Hashable, PageEntry]' = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: str) -> Optional[PageEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: str, body: bytes, mimetype: str) -> Optional[PageEntry]:
+        entry = PageEntry(version, body, mimetype)
+        if entry.size > self.max_bytes:
+            return None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+        return entry
+
+    def add_variant(self, key: Hashable, version: str, encoding: str, data: bytes) -> None:
+        """Store a compressed copy of a cached page so it is only compressed once."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version or encoding in entry.variants:
+                return
+            entry.variants[encoding] = data
+            self._bytes += len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,468 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class StaleDataError(RuntimeError):
+    """
+    Raised by a processor that finds the data file it was built from changed
+    in place, so it can no longer read the version it indexed. The cached
+    processor is dropped (see ``ProcessorCache.discard``) and rebuilt on the
+    next request.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(f"{path} changed since it was indexed")
+        self.path = path
+
+
+class FileFingerprint(NamedTuple):
+    """Identity of a data file on disk, used to decide when a parse is stale."""
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: Optional[str] = None
+
+    def same_stat(self, other: Optional['FileFingerprint']) -> bool:
+        return other is not None and (self.path, self.size, self.mtime_ns) == (other.path, other.size, other.mtime_ns)
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_file(path: str, hash_content: bool = False) -> Optional[FileFingerprint]:
+    """Return the fingerprint of ``path`` or ``None`` when the file does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    content_hash = hash_file(path) if hash_content else None
+    return FileFingerprint(os.path.abspath(path), stat.st_size, stat.st_mtime_ns, content_hash)
+
+
+class _CacheSlot:
+    __slots__ = ('path', 'builder', 'updater', 'value', 'fingerprint', 'failed_fingerprint', 'last_error', 'build_lock',
+                 'hits', 'misses', 'builds', 'build_errors', 'last_build_seconds', 'total_build_seconds')
+
+    def __init__(self, path: str, builder: Callable[[str], Any],
+                 updater: Optional[Callable[[Any, str], Any]] = None) -> None:
+        self.path = path
+        self.builder = builder
+        self.updater = updater
+        self.value: Any = None
+        self.fingerprint: Optional[FileFingerprint] = None
+        self.failed_fingerprint: Optional[FileFingerprint] = None
+        self.last_error: Optional[str] = None
+        self.build_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.build_errors = 0
+        self.last_build_seconds = 0.0
+        self.total_build_seconds = 0.0
+
+
+class _DerivedSlot:
+    __slots__ = ('inputs', 'builder', 'value', 'key', 'build_lock',
+                 'hits', 'misses', 'last_build_seconds', 'total_build_seconds')
+
+    def __init__(self, inputs: Sequence[str], builder: Callable[..., Any]) -> None:
+        self.inputs = tuple(inputs)
+        self.builder = builder
+        self.value: Any = None
+        self.key: Any = None
+        self.build_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.last_build_seconds = 0.0
+        self.total_build_seconds = 0.0
+
+
+class ProcessorCache:
+    """
+    Process-wide cache holding one parsed processor per data file.
+
+    Each registered entry is keyed by the file fingerprint (path, size, mtime and,
+    optionally, a SHA-256 of the content). The builder only runs when the
+    fingerprint changes, so steady-state requests never touch the parsers.
+
+    Derived results (metrics, unused-measure analysis, ...) are registered on top
+    of processors or other derived results. Their key is the fingerprint tuple of
+    their inputs, so a change to one data file only recomputes the results that
+    transitively depend on it.
+
+    With ``serve_stale`` enabled (used together with ``DataWatcher``), readers
+    always get the last published processor and rebuilds happen in ``refresh``.
+    """
+
+    def __init__(self, hash_content: bool = False, logger: Any = None, serve_stale: bool = False) -> None:
+        self.hash_content = hash_content
+        self.logger = logger
+        self.serve_stale = serve_stale
+        self._slots: Dict[str, _CacheSlot] = {}
+        self._derived: Dict[str, _DerivedSlot] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str, builder: Callable[[str], Any],
+                 updater: Optional[Callable[[Any, str], Any]] = None) -> None:
+        """
+        Register a processor built by ``builder(path)``. When given,
+        ``updater(previous, path)`` is used instead once a version is cached,
+        so processors that can patch themselves from the previous version
+        (e.g. re-parsing only changed rows) avoid a full rebuild.
+        """
+        with self._lock:
+            self._slots[name] = _CacheSlot(path, builder, updater)
+
+    def names(self) -> List[str]:
+        return list(self._slots)
+
+    def path(self, name: str) -> str:
+        return self._slots[name].path
+
+    def view(self) -> 'CacheView':
+        """Return a consistent view for one reader (typically one HTTP request)."""
+        return CacheView(self)
+
+    def current_fingerprint(self, name: str) -> Optional[FileFingerprint]:
+        """
+        Fingerprint of the file as it is on disk now.
+
+        The content hash is only computed when size or mtime differ from the
+        cached entry; otherwise the cached hash is reused.
+        """
+        slot = self._slots[name]
+        fingerprint = fingerprint_file(slot.path)
+        if fingerprint is None or not self.hash_content:
+            return fingerprint
+        cached = slot.fingerprint
+        if fingerprint.same_stat(cached):
+            return cached
+        return fingerprint._replace(content_hash=hash_file(slot.path))
+
+    def effective_fingerprint(self, name: str) -> Optional[FileFingerprint]:
+        """
+        Fingerprint of the version a reader would get right now, without building
+        anything: the served version when stale serving is on or the file on disk
+        is known to be broken, the on-disk file otherwise.
+        """
+        slot = self._slots[name]
+        if self.serve_stale and slot.fingerprint is not None:
+            return slot.fingerprint
+        fingerprint = self.current_fingerprint(name)
+        if fingerprint is not None and fingerprint == slot.failed_fingerprint:
+            return slot.fingerprint
+        return fingerprint
+
+    def served_fingerprint(self, name: str) -> Optional[FileFingerprint]:
+        """Fingerprint of the processor currently being served, if any."""
+        return self._slots[name].fingerprint
+
+    def _is_fresh(self, slot: _CacheSlot, fingerprint: Optional[FileFingerprint]) -> bool:
+        if slot.fingerprint is None or fingerprint is None:
+            return False
+        if fingerprint == slot.fingerprint:
+            return True
+        if self.hash_content and fingerprint.content_hash == slot.fingerprint.content_hash:
+            # Same bytes under a new mtime: keep the parse, remember the new stat.
+            slot.fingerprint = fingerprint
+            return True
+        return False
+
+    def get(self, name: str) -> Any:
+        """Return the processor for ``name``, rebuilding it if the file changed."""
+        return self._get_entry(name)[0]
+
+    def _get_entry(self, name: str) -> Tuple[Any, Optional[FileFingerprint]]:
+        slot = self._slots[name]
+        if self.serve_stale:
+            with self._lock:
+                if slot.fingerprint is not None:
+                    slot.hits += 1
+                    return slot.value, slot.fingerprint
+
+        fingerprint = self.current_fingerprint(name)
+        with self._lock:
+            if self._is_fresh(slot, fingerprint):
+                slot.hits += 1
+                return slot.value, slot.fingerprint
+            if slot.fingerprint is not None and fingerprint is not None and fingerprint == slot.failed_fingerprint:
+                # This version already failed to build; keep serving the last good one.
+                slot.hits += 1
+                return slot.value, slot.fingerprint
+
+        with slot.build_lock:
+            # Another thread may have finished the build while we waited.
+            fingerprint = self.current_fingerprint(name)
+            with self._lock:
+                if self._is_fresh(slot, fingerprint):
+                    slot.hits += 1
+                    return slot.value, slot.fingerprint
+                slot.misses += 1
+
+            value = self._build(name, slot, fingerprint)
+            if value is None:
+                return slot.value, slot.fingerprint
+            with self._lock:
+                slot.value = value
+                slot.fingerprint = fingerprint
+            return value, fingerprint
+
+    def _build(self, name: str, slot: _CacheSlot, fingerprint: Optional[FileFingerprint]) -> Any:
+        """
+        Run the builder for ``slot``. On failure the error is re-raised when there
+        is nothing to fall back to; otherwise it is logged and ``None`` returned so
+        the caller keeps the last good processor.
+        """
+        previous = slot.value
+        incremental = slot.updater is not None and previous is not None
+        started = time.perf_counter()
+        try:
+            value = slot.updater(previous, slot.path) if incremental else slot.builder(slot.path)
+        except Exception as e:
+            with self._lock:
+                slot.build_errors += 1
+                slot.failed_fingerprint = fingerprint
+                slot.last_error = f"{type(e).__name__}: {e}"
+                has_fallback = slot.fingerprint is not None
+            if not has_fallback:
+                raise
+            if self.logger is not None:
+                self.logger.warning("Rebuilding %s from %s failed, serving last good version: %s",
+                                    name, slot.path, slot.last_error)
+            return None
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            slot.builds += 1
+            slot.failed_fingerprint = None
+            slot.last_error = None
+            slot.last_build_seconds = elapsed
+            slot.total_build_seconds += elapsed
+        if self.logger is not None:
+            self.logger.info("%s %s processor from %s in %.3fs", "Updated" if incremental else "Built",
+                             name, slot.path, elapsed)
+        return value
+
+    def refresh(self, name: str) -> bool:
+        """
+        Rebuild ``name`` from disk without blocking readers.
+
+        The new processor and every derived result that depends on it are built
+        off to the side and published together; requests already holding a view
+        keep the previous versions. Returns ``True`` when a new version was
+        published.
+        """
+        slot = self._slots[name]
+        with slot.build_lock:
+            fingerprint = self.current_fingerprint(name)
+            with self._lock:
+                if fingerprint is None or self._is_fresh(slot, fingerprint) or fingerprint == slot.failed_fingerprint:
+                    return False
+                slot.misses += 1
+            value = self._build(name, slot, fingerprint)
+            if value is None:
+                return False
+
+            staging = CacheView(self, overrides={name: (value, fingerprint)}, publish=False)
+            for derived_name, derived in self._derived.items():
+                if derived.key is not None and self._depends_on(derived_name, name):
+                    staging.get_derived(derived_name)
+
+            with self._lock:
+                slot.value = value
+                slot.fingerprint = fingerprint
+                for derived_name, (derived_value, key) in staging.derived_entries().items():
+                    derived = self._derived[derived_name]
+                    derived.value = derived_value
+                    derived.key = key
+            return True
+
+    def _depends_on(self, derived_name: str, name: str) -> bool:
+        for input_name in self._derived[derived_name].inputs:
+            if input_name == name or (input_name in self._derived and self._depends_on(input_name, name)):
+                return True
+        return False
+
+    def register_derived(self, name: str, inputs: Sequence[str], builder: Callable[..., Any]) -> None:
+        """
+        Register a result computed from ``inputs`` (processor or derived names).
+
+        ``builder`` is called with the input values in order.
+        """
+        for input_name in inputs:
+            if input_name not in self._slots and input_name not in self._derived:
+                raise KeyError(f"Unknown input '{input_name}' for derived result '{name}'")
+        with self._lock:
+            self._derived[name] = _DerivedSlot(inputs, builder)
+
+    def get_derived(self, name: str) -> Any:
+        """Return the derived result ``name``, recomputing it only if an input changed."""
+        return self.view().get_derived(name)
+
+    def _compute_derived(self, name: str, key: Any, values: List[Any], publish: bool) -> Any:
+        slot = self._derived[name]
+        with self._lock:
+            if slot.key == key:
+                slot.hits += 1
+                return slot.value
+
+        with slot.build_lock if publish else _NO_LOCK:
+            with self._lock:
+                if slot.key == key:
+                    slot.hits += 1
+                    return slot.value
+                slot.misses += 1
+
+            started = time.perf_counter()
+            value = slot.builder(*values)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                if publish:
+                    slot.value = value
+                    slot.key = key
+                slot.last_build_seconds = elapsed
+                slot.total_build_seconds += elapsed
+            if self.logger is not None:
+                self.logger.debug("Computed %s in %.3fs", name, elapsed)
+            return value
+
+    def seed(self, name: str, value: Any, fingerprint: FileFingerprint) -> None:
+        """Install an already-built processor (e.g. restored from a snapshot)."""
+        if not self.hash_content:
+            fingerprint = fingerprint._replace(content_hash=None)
+        slot = self._slots[name]
+        with self._lock:
+            slot.value = value
+            slot.fingerprint = fingerprint
+
+    def peek(self, name: str) -> Any:
+        """Return the cached processor without checking freshness or building."""
+        return self._slots[name].value
+
+    def discard(self, path: str) -> List[str]:
+        """
+        Drop the processors built from ``path`` after one raised
+        ``StaleDataError``, so the next reader rebuilds them even when the
+        file's size and mtime look unchanged. Returns the dropped names.
+        """
+        path = os.path.abspath(path)
+        names = [name for name, slot in self._slots.items() if os.path.abspath(slot.path) == path]
+        for name in names:
+            self.invalidate(name)
+        return names
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            slots = self._slots.values() if name is None else [self._slots[name]]
+            for slot in slots:
+                slot.value = None
+                slot.fingerprint = None
+            if name is None:
+                for derived in self._derived.values():
+                    derived.value = None
+                    derived.key = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    'path': slot.path,
+                    'cached': slot.fingerprint is not None,
+                    'fingerprint': slot.fingerprint._asdict() if slot.fingerprint else None,
+                    'hits': slot.hits,
+                    'misses': slot.misses,
+                    'builds': slot.builds,
+                    'build_errors': slot.build_errors,
+                    'last_error': slot.last_error,
+                    'last_build_seconds': round(slot.last_build_seconds, 6),
+                    'total_build_seconds': round(slot.total_build_seconds, 6),
+                }
+                for name, slot in self._slots.items()
+            }
+
+    def derived_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    'inputs': list(slot.inputs),
+                    'cached': slot.key is not None,
+                    'hits': slot.hits,
+                    'misses': slot.misses,
+                    'last_build_seconds': round(slot.last_build_seconds, 6),
+                    'total_build_seconds': round(slot.total_build_seconds, 6),
+                }
+                for name, slot in self._derived.items()
+            }
+
+
+class _NoLock:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NO_LOCK = _NoLock()
+
+
+class CacheView:
+    """
+    Pins processor and derived versions for the lifetime of one reader.
+
+    Everything resolved through a view comes from the same data versions, even
+    if a background refresh publishes new ones halfway through a request.
+    """
+
+    def __init__(self, cache: ProcessorCache,
+                 overrides: Optional[Dict[str, Tuple[Any, Optional[FileFingerprint]]]] = None,
+                 publish: bool = True) -> None:
+        self._cache = cache
+        self._publish = publish
+        self._entries: Dict[str, Tuple[Any, Optional[FileFingerprint]]] = dict(overrides or {})
+        self._derived_entries: Dict[str, Tuple[Any, Any]] = {}
+
+    def get(self, name: str) -> Any:
+        return self._entry(name)[0]
+
+    def fingerprint(self, name: str) -> Optional[FileFingerprint]:
+        return self._entry(name)[1]
+
+    def get_derived(self, name: str) -> Any:
+        return self._derived_entry(name)[0]
+
+    def derived_entries(self) -> Dict[str, Tuple[Any, Any]]:
+        return dict(self._derived_entries)
+
+    def _entry(self, name: str) -> Tuple[Any, Optional[FileFingerprint]]:
+        if name not in self._entries:
+            self._entries[name] = self._cache._get_entry(name)
+        return self._entries[name]
+
+    def _derived_entry(self, name: str) -> Tuple[Any, Any]:
+        if name in self._derived_entries:
+            return self._derived_entries[name]
+
+        values = []
+        keys = []
+        for input_name in self._cache._derived[name].inputs:
+            if input_name in self._cache._slots:
+                value, key = self._entry(input_name)
+            else:
+                value, key = self._derived_entry(input_name)
+            values.append(value)
+            keys.append(key)
+        key = tuple(keys)
+
+        entry = (self._cache._compute_derived(name, key, values, self._publish), key)
+        self._derived_entries[name] = entry
+        return entry
@@ -0,0 +1,139 @@
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from processor_cache import FileFingerprint, fingerprint_file
+
+# Bump whenever the state returned by a processor's ``to_snapshot`` changes shape.
+SNAPSHOT_SCHEMA_VERSION = 11
+SNAPSHOT_MAGIC = b'PBIASNAP'
+
+SnapshotEntries = Dict[str, Tuple[FileFingerprint, Dict[str, Any]]]
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or from another schema version."""
+
+
+def save_snapshot(path: str, entries: SnapshotEntries) -> int:
+    """
+    Write processor states to ``path`` atomically and return the file size.
+
+    ``entries`` maps a cache name ('report', 'lineage', 'model') to the
+    fingerprint of the source file and the processor's ``to_snapshot()`` state.
+    """
+    payload = {
+        'schema_version': SNAPSHOT_SCHEMA_VERSION,
+        'entries': {name: (tuple(fingerprint), state) for name, (fingerprint, state) in entries.items()},
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(SNAPSHOT_MAGIC)
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+
+def load_snapshot(path: str) -> SnapshotEntries:
+    """
+    Read a snapshot written by ``save_snapshot``.
+
+    Snapshots are pickles and must only be loaded from the trusted data directory.
+    """
+    try:
+        with open(path, 'rb') as file:
+            if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise SnapshotError(f"{path} is not an analysis snapshot")
+            payload = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        raise SnapshotError(f"Unable to read snapshot {path}: {e}") from e
+
+    version = payload.get('schema_version')
+    if version != SNAPSHOT_SCHEMA_VERSION:
+        raise SnapshotError(
+            f"Snapshot schema version {version} does not match expected {SNAPSHOT_SCHEMA_VERSION}")
+
+    return {
+        name: (FileFingerprint(*fingerprint), state)
+        for name, (fingerprint, state) in payload.get('entries', {}).items()
+    }
+
+
+def fingerprint_matches(snapshot_fp: FileFingerprint, current_fp: Optional[FileFingerprint]) -> bool:
+    """
+    A snapshot entry is valid when the source file has the same size and mtime,
+    or - after a copy that reset the mtime - the same content hash.
+    """
+    if current_fp is None:
+        return False
+    if (snapshot_fp.size, snapshot_fp.mtime_ns) == (current_fp.size, current_fp.mtime_ns):
+        return True
+    return (snapshot_fp.size == current_fp.size
+            and snapshot_fp.content_hash is not None
+            and snapshot_fp.content_hash == current_fp.content_hash)
+
+
+def build_snapshot(cache: Any, path: str) -> Dict[str, Any]:
+    """
+    Build (or reuse) every processor registered in ``cache`` and persist their
+    states to ``path``. Returns a summary suitable for printing.
+    """
+    entries: SnapshotEntries = {}
+    for name in cache.names():
+        source_path = cache.path(name)
+        before = fingerprint_file(source_path, hash_content=True)
+        if before is None:
+            continue
+        processor = cache.get(name)
+        after = fingerprint_file(source_path)
+        if not before.same_stat(after):
+            raise SnapshotError(f"{source_path} changed while the snapshot was being built")
+        entries[name] = (before, processor.to_snapshot())
+
+    size = save_snapshot(path, entries)
+    return {'path': path, 'bytes': size, 'entries': sorted(entries)}
+
+
+def restore_snapshot(cache: Any, path: str, restorers: Dict[str, Callable[[str, Dict[str, Any]], Any]],
+                     logger: Any = None) -> Dict[str, bool]:
+    """
+    Seed ``cache`` from the snapshot at ``path``.
+
+    Each entry is validated against the current source file independently, so a
+    single changed file only falls back to parsing that file. Returns which
+    entries were restored.
+    """
+    restored: Dict[str, bool] = {}
+    if not os.path.exists(path):
+        return restored
+    try:
+        entries = load_snapshot(path)
+    except SnapshotError as e:
+        if logger is not None:
+            logger.warning("Ignoring analysis snapshot: %s", e)
+        return restored
+
+    for name in cache.names():
+        restored[name] = False
+        if name not in entries or name not in restorers:
+            continue
+        snapshot_fp, state = entries[name]
+        source_path = cache.path(name)
+        current = fingerprint_file(source_path)
+        if current is not None and (snapshot_fp.size, snapshot_fp.mtime_ns) != (current.size, current.mtime_ns):
+            current = fingerprint_file(source_path, hash_content=True)
+        if not fingerprint_matches(snapshot_fp, current):
+            if logger is not None:
+                logger.info("Snapshot entry for %s is stale; it will be rebuilt on demand", name)
+            continue
+        cache.seed(name, restorers[name](source_path, state), current)
+        restored[name] = True
+    return restored
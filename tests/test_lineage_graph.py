@@ -0,0 +1,531 @@
+"""
+Lineage traversals checked against brute-force references on random graphs.
+
+Each lineage is written as a MeasureDependencies.tsv and loaded through
+LineageView, while the references below work directly on the generated
+parent/child lists, the way the analyses were written before the graph
+layer existed.
+"""
+import os
+import random
+import tempfile
+import unittest
+from collections import deque
+
+from lineage_view import LineageView
+
+HEADER = "Measure\tDAXExpression\tParentMeasures\tChildMeasures\tTable\tColumns\n"
+
+
+def random_lineage(rng, count, max_parents=3, cycles=True, unknown=True):
+    """
+    Random lineage as {measure: {'parent_measures', 'child_measures', 'columns'}}.
+
+    Parents mostly come from earlier measures. With ``cycles`` a few point
+    to later measures (or the measure itself), and with ``unknown`` a few
+    reference names that have no row. Child lists are the reverse of the
+    parent lists, plus the odd unknown child.
+    """
+    names = [f"M{index}" for index in range(count)]
+    lineage = {}
+    for index, name in enumerate(names):
+        parents = []
+        for _ in range(rng.randint(0, max_parents)):
+            roll = rng.random()
+            if unknown and roll < 0.05:
+                parents.append(f"Ghost {rng.randint(0, 3)}")
+            elif cycles and roll < 0.12:
+                parents.append(rng.choice(names[index:]))
+            elif index:
+                parents.append(rng.choice(names[:index]))
+        if parents and rng.random() < 0.05:
+            parents.append(parents[0])
+        if max_parents == 1:
+            parents = parents[:1]
+        columns = [f"T[c{rng.randint(0, count // 3)}]" for _ in range(rng.randint(0, 2))]
+        lineage[name] = {'parent_measures': parents, 'child_measures': [], 'columns': columns}
+
+    for name, data in lineage.items():
+        for parent in dict.fromkeys(data['parent_measures']):
+            if parent in lineage:
+                lineage[parent]['child_measures'].append(name)
+    for data in lineage.values():
+        if unknown and rng.random() < 0.03:
+            data['child_measures'].append("Ghost child")
+    return lineage
+
+
+def write_tsv(path, lineage):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(HEADER)
+        for name, data in lineage.items():
+            file.write('\t'.join([
+                name, f"SUM(T[{name}])", '; '.join(data['parent_measures']),
+                '; '.join(data['child_measures']), 'T', '; '.join(data['columns']),
+            ]) + '\n')
+
+
+def reference_walk(lineage, start, key):
+    """Names reachable from ``start`` (excluded unless on a cycle) along ``key`` lists."""
+    reached = set()
+    stack = list(start)
+    while stack:
+        for neighbour in lineage.get(stack.pop(), {}).get(key, []):
+            if neighbour and neighbour not in reached:
+                reached.add(neighbour)
+                stack.append(neighbour)
+    return reached
+
+
+def reference_dependents(lineage):
+    """The parent links reversed: {name: {'parent_measures': [dependent, ...]}}."""
+    dependents = {}
+    for name, data in lineage.items():
+        for parent in data['parent_measures']:
+            dependents.setdefault(parent, {'parent_measures': []})['parent_measures'].append(name)
+    return dependents
+
+
+def reference_unused(lineage, used_measures):
+    """The cascade of unused measures, ported from the per-name implementation."""
+    used_measures = {name for name in used_measures if name}
+    used_measures |= reference_walk(lineage, used_measures, 'parent_measures')
+    unused_measures = set(lineage) - used_measures
+
+    child_to_parents = {}
+    for name, data in lineage.items():
+        for child in data['child_measures']:
+            child_to_parents.setdefault(child, set()).add(name)
+
+    deletion_chain = []
+    all_unused = set(unused_measures)
+    measures_to_check = list(unused_measures)
+    while measures_to_check:
+        current_unused = set(measures_to_check)
+        measures_to_check = []
+        for unused_measure in current_unused:
+            for parent in child_to_parents.get(unused_measure, ()):
+                if parent in all_unused or parent in used_measures:
+                    continue
+                children = lineage[parent]['child_measures']
+                if children and all(child in all_unused for child in children):
+                    all_unused.add(parent)
+                    measures_to_check.append(parent)
+        deletion_chain.append(current_unused)
+    return used_measures, unused_measures, all_unused, deletion_chain
+
+
+def reference_distances(lineage, start, key, depth):
+    """Breadth-first link counts from ``start`` along ``key`` lists, up to ``depth``."""
+    distances = {name: 0 for name in start}
+    frontier = list(distances)
+    for distance in range(1, depth + 1):
+        next_frontier = []
+        for name in frontier:
+            for neighbour in lineage.get(name, {}).get(key, []):
+                if neighbour and neighbour not in distances:
+                    distances[neighbour] = distance
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+    return distances
+
+
+def reference_deletion_levels(lineage, measure_names, max_depth=None):
+    """
+    Deletion levels by fixpoint: level k + 1 holds the measures not deleted
+    yet that have a parent on level k and only deleted parents.
+    """
+    levels = [set(measure_names)]
+    deleted = set(measure_names)
+    while levels[-1] and (max_depth is None or len(levels) < max_depth):
+        next_level = {
+            name for name, data in lineage.items()
+            if name not in deleted
+            and any(parent in levels[-1] for parent in data['parent_measures'])
+            and all(parent in deleted for parent in data['parent_measures'])
+        }
+        if not next_level:
+            break
+        levels.append(next_level)
+        deleted |= next_level
+    return levels
+
+
+def reference_three_levels(lineage, measure_names):
+    """The first three deletion levels, ported from the per-name implementation."""
+    level2 = [
+        name for name, data in lineage.items()
+        if name not in measure_names
+        and any(parent in measure_names for parent in data['parent_measures'])
+        and all(parent in measure_names for parent in data['parent_measures'])
+    ]
+    previous_levels = set(measure_names) | set(level2)
+    level3 = [
+        name for name, data in lineage.items()
+        if name not in measure_names and name not in level2
+        and any(parent in level2 for parent in data['parent_measures'])
+        and all(parent in previous_levels for parent in data['parent_measures'])
+    ]
+    return [set(measure_names), set(level2), set(level3)]
+
+
+def reference_components(lineage):
+    """
+    Strongly connected components by mutual reachability: {name: frozenset}
+    for every name in the lineage, and whether the name lies on a cycle.
+    """
+    names = set(lineage)
+    for data in lineage.values():
+        names.update(data['parent_measures'], data['child_measures'])
+    ancestors = {name: reference_walk(lineage, [name], 'parent_measures') for name in names}
+    components = {
+        name: frozenset({name} | {other for other in ancestors[name] if name in ancestors[other]})
+        for name in names
+    }
+    return components, {name: name in ancestors[name] for name in names}
+
+
+def with_diamond(lineage):
+    """Add measures where one has two parent components, so the lineage is not a forest."""
+    for name, parents in (('Top', []), ('Left', ['Top']), ('Right', ['Top']), ('Bottom', ['Left', 'Right'])):
+        lineage[name] = {'parent_measures': parents, 'child_measures': [], 'columns': []}
+    lineage['Top']['child_measures'] = ['Left', 'Right']
+    lineage['Left']['child_measures'] = lineage['Right']['child_measures'] = ['Bottom']
+    return lineage
+
+
+class LineageGraphTestCase(unittest.TestCase):
+    """Writes random lineages to a temporary TSV and loads them."""
+
+    seeds = range(60)
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+
+    def load(self, lineage, **kwargs):
+        path = os.path.join(self._directory.name, 'MeasureDependencies.tsv')
+        write_tsv(path, lineage)
+        lineage_view = LineageView(path, **kwargs)
+        lineage_view.process_lineage_data()
+        return lineage_view
+
+    def random_cases(self, diamond=False, view_options=None, **kwargs):
+        """Yield ``(seed, rng, lineage, view)`` for every seed."""
+        for seed in self.seeds:
+            rng = random.Random(seed)
+            lineage = random_lineage(rng, rng.randint(1, 60), **kwargs)
+            if diamond:
+                with_diamond(lineage)
+            yield seed, rng, lineage, self.load(lineage, **(view_options or {}))
+
+
+class TraversalTests(LineageGraphTestCase):
+
+    def test_expand_used_measures(self):
+        for seed, rng, lineage, lineage_view in self.random_cases():
+            with self.subTest(seed=seed):
+                used = set(rng.sample(sorted(lineage), rng.randint(0, len(lineage)))) | {'Unknown', ''}
+                expected = {name for name in used if name} | reference_walk(lineage, used, 'parent_measures')
+                self.assertEqual(lineage_view.expand_used_measures(used), expected)
+
+    def test_full_dependency_chain(self):
+        for seed, rng, lineage, lineage_view in self.random_cases():
+            with self.subTest(seed=seed):
+                start = rng.sample(sorted(lineage), min(len(lineage), 3)) + ['Unknown']
+                expected = set(start)
+                queue = deque(start)
+                while queue:
+                    data = lineage.get(queue.popleft())
+                    if data is None:
+                        continue
+                    for neighbour in data['parent_measures'] + data['child_measures']:
+                        if neighbour not in expected:
+                            expected.add(neighbour)
+                            queue.append(neighbour)
+                chain = lineage_view.get_full_dependency_chain(start)
+                self.assertEqual(set(chain), expected)
+                for name, dependencies in chain.items():
+                    self.assertEqual(dependencies, lineage_view.get_measure_dependencies(name))
+
+    def test_unknown_measure_has_no_dependencies(self):
+        lineage_view = self.load({'A': {'parent_measures': ['Ghost'], 'child_measures': [], 'columns': []}})
+        self.assertEqual(lineage_view.expand_used_measures({'A'}), {'A', 'Ghost'})
+        self.assertEqual(lineage_view.get_measure_dependencies('Ghost')['type'], 'unknown')
+
+
+class ReachabilityModeTests(LineageGraphTestCase):
+    """The same queries in each ReachabilityIndex mode."""
+
+    def check_reachability(self, expected_mode, diamond=False, view_options=None, **kwargs):
+        for seed, rng, lineage, lineage_view in self.random_cases(diamond, view_options, **kwargs):
+            with self.subTest(seed=seed):
+                self.assertEqual(lineage_view.reachability_index().mode, expected_mode)
+                dependents = reference_dependents(lineage)
+                names = sorted(set(lineage) | set(dependents)) + ['Nope']
+                upstream = {name: reference_walk(lineage, [name], 'parent_measures') for name in names}
+                for name in names:
+                    self.assertEqual(lineage_view.get_upstream_measures(name), upstream[name])
+                    self.assertEqual(lineage_view.get_downstream_measures(name),
+                                     reference_walk(dependents, [name], 'parent_measures'))
+                for _ in range(200):
+                    upstream_name, measure_name = rng.choice(names), rng.choice(names)
+                    self.assertEqual(lineage_view.is_upstream(upstream_name, measure_name),
+                                     upstream_name in upstream[measure_name])
+                used = set(rng.sample(names, rng.randint(0, len(names))))
+                self.assertEqual(lineage_view.expand_used_measures(used),
+                                 used | reference_walk(lineage, used, 'parent_measures'))
+
+    def test_bfs_mode(self):
+        self.check_reachability('bfs', view_options={'reachability_max_bytes': 0})
+
+    def test_bfs_mode_over_budget(self):
+        self.check_reachability('bfs', diamond=True, view_options={'reachability_max_bytes': 1})
+
+    def test_interval_mode(self):
+        # With one parent per measure every cycle is closed, so the
+        # components form a forest even with back edges and self-loops
+        self.check_reachability('interval', max_parents=1)
+
+    def test_bitset_mode(self):
+        self.check_reachability('bitset', diamond=True)
+
+
+class UnusedMeasureTests(LineageGraphTestCase):
+
+    def test_comprehensive_unused_measures(self):
+        for seed, rng, lineage, lineage_view in self.random_cases():
+            with self.subTest(seed=seed):
+                names = sorted(lineage)
+                used = set(rng.sample(names, rng.randint(0, min(len(names), 5)))) | {'Ghost 0', ''}
+                used_measures, unused_measures, all_unused, deletion_chain = reference_unused(lineage, used)
+
+                result = lineage_view.get_comprehensive_unused_measures(used)
+                self.assertEqual(result['all_unused'], sorted(all_unused))
+                self.assertEqual([set(level) for level in result['deletion_chain']], deletion_chain)
+                self.assertEqual(result['total_unused'], len(all_unused))
+                self.assertEqual(result['immediate_unused'], len(unused_measures))
+                self.assertEqual(result['cascade_unused'], len(all_unused) - len(unused_measures))
+                self.assertEqual(set(result['impact_analysis']), all_unused)
+                for name, impact in result['impact_analysis'].items():
+                    self.assertEqual(impact['parent_measures'], lineage[name]['parent_measures'])
+                    self.assertEqual(impact['child_measures'], lineage[name]['child_measures'])
+                    self.assertEqual(impact['reason'] == "Would become unused after removing child measures",
+                                     name in used_measures)
+
+    def test_nothing_used(self):
+        for seed, _, lineage, lineage_view in self.random_cases():
+            with self.subTest(seed=seed):
+                result = lineage_view.get_comprehensive_unused_measures(set())
+                self.assertEqual(result['all_unused'], sorted(lineage))
+                self.assertEqual(result['cascade_unused'], 0)
+
+
+class DeletionImpactTests(LineageGraphTestCase):
+
+    def deletion_cases(self):
+        for seed, rng, lineage, lineage_view in self.random_cases(max_parents=2):
+            # Roots and unknown parents make the deepest chains
+            roots = [name for name, data in lineage.items() if not data['parent_measures']]
+            selected = rng.sample(roots, min(len(roots), rng.randint(0, 3)))
+            others = sorted(set(lineage) - set(selected)) + ['Ghost 0', 'Ghost 1', 'Nope']
+            selected += rng.sample(others, rng.randint(0, 3))
+            yield seed, lineage, lineage_view, selected or ['Nope']
+
+    def assert_levels(self, result, levels):
+        chain = result['chain']
+        padded = levels + [set()] * (3 - len(levels))
+        self.assertEqual([f"level{depth}" for depth in range(1, len(padded) + 1)], list(chain))
+        self.assertEqual([set(level) for level in chain.values()], padded)
+        for level in chain.values():
+            self.assertEqual(len(level), len(set(level)))
+        self.assertEqual(result['impact_score'], sum(depth * len(level) for depth, level in enumerate(padded, 1)))
+        self.assertEqual(result['total_measures'], sum(len(level) for level in padded))
+
+    def test_all_levels(self):
+        deepest = 0
+        for seed, lineage, lineage_view, selected in self.deletion_cases():
+            with self.subTest(seed=seed):
+                levels = reference_deletion_levels(lineage, selected)
+                deepest = max(deepest, len(levels))
+                result = lineage_view.analyze_deletion_impact(selected)
+                self.assertEqual(result['chain']['level1'], selected)
+                self.assert_levels(result, levels)
+        self.assertGreater(deepest, 3)
+
+    def test_max_depth(self):
+        for seed, lineage, lineage_view, selected in self.deletion_cases():
+            with self.subTest(seed=seed):
+                for max_depth in (1, 2, 3, 4):
+                    self.assert_levels(lineage_view.analyze_deletion_impact(selected, max_depth=max_depth),
+                                       reference_deletion_levels(lineage, selected, max_depth))
+
+    def test_three_levels_match_per_name_implementation(self):
+        for seed, lineage, lineage_view, selected in self.deletion_cases():
+            with self.subTest(seed=seed):
+                chain = lineage_view.analyze_deletion_impact(selected, max_depth=3)['chain']
+                self.assertEqual([set(level) for level in chain.values()], reference_three_levels(lineage, selected))
+
+
+class DependencySubgraphTests(LineageGraphTestCase):
+
+    def subgraph_cases(self):
+        for seed, rng, lineage, lineage_view in self.random_cases():
+            known = set(lineage)
+            for data in lineage.values():
+                known.update(data['parent_measures'], data['child_measures'])
+            start = rng.sample(sorted(lineage), min(len(lineage), rng.randint(1, 3))) + ['Ghost 0', 'Nope']
+            depth_up, depth_down = rng.randint(0, 4), rng.randint(0, 4)
+            yield seed, rng, lineage, lineage_view, [name for name in start if name in known], depth_up, depth_down, (
+                lineage_view.get_dependency_subgraph(start, depth_up, depth_down))
+
+    def test_neighbourhood(self):
+        for seed, _, lineage, lineage_view, start, depth_up, depth_down, result in self.subgraph_cases():
+            with self.subTest(seed=seed):
+                up = reference_distances(lineage, start, 'parent_measures', depth_up)
+                down = reference_distances(lineage, start, 'child_measures', depth_down)
+                measures = [node for node in result['nodes'] if node.get('type') != 'column']
+                columns = [node for node in result['nodes'] if node.get('type') == 'column']
+                self.assertEqual(result['nodes'], measures + columns)
+                self.assertEqual({node['id'] for node in measures}, set(up) | set(down))
+                self.assertEqual(len(measures), len(set(up) | set(down)))
+
+                # A node reached both ways keeps the nearer side; ties may go either way
+                levels = {}
+                for node in measures:
+                    name, level = node['id'], node['level']
+                    nearest = min(up.get(name, depth_up + depth_down + 1), down.get(name, depth_up + depth_down + 1))
+                    self.assertEqual(abs(level), nearest)
+                    self.assertEqual(up.get(name) if level < 0 else down.get(name), abs(level))
+                    levels[name] = level
+                self.assertEqual([abs(node['level']) for node in measures],
+                                 sorted(abs(node['level']) for node in measures))
+
+                # Columns of the start and upstream measures, one level above their nearest reader
+                column_levels = {}
+                for name, level in levels.items():
+                    if name in lineage and -depth_up < level <= 0:
+                        for column in lineage[name]['columns']:
+                            column_levels[column] = max(column_levels.get(column, level - 1), level - 1)
+                self.assertEqual({node['id']: node['level'] for node in columns}, column_levels)
+                self.assertEqual(len(columns), len(column_levels))
+
+                expected_edges = set()
+                for name in levels:
+                    for parent in lineage.get(name, {}).get('parent_measures', []):
+                        if parent in levels:
+                            expected_edges.add((parent, name))
+                    for column in lineage.get(name, {}).get('columns', []):
+                        if column in column_levels:
+                            expected_edges.add((column, name))
+                edges = [(edge['from'], edge['to']) for edge in result['edges']]
+                self.assertEqual(sorted(edges), sorted(expected_edges))
+                self.assertEqual(result['total_nodes'], len(result['nodes']))
+                self.assertFalse(result['truncated'])
+                self.assertIsNone(result['next_cursor'])
+
+    def test_pages(self):
+        for seed, rng, _, lineage_view, start, depth_up, depth_down, result in self.subgraph_cases():
+            with self.subTest(seed=seed):
+                limit = rng.randint(1, 10)
+                nodes, edges, loaded = [], [], set()
+                cursor = 0
+                while cursor is not None:
+                    page = lineage_view.get_dependency_subgraph(start, depth_up, depth_down,
+                                                                cursor=cursor, limit=limit)
+                    self.assertLessEqual(len(page['nodes']), limit)
+                    self.assertEqual(page['total_nodes'], result['total_nodes'])
+                    nodes.extend(page['nodes'])
+                    loaded.update(node['id'] for node in page['nodes'])
+                    # Every edge of a page joins nodes loaded by the end of it
+                    for edge in page['edges']:
+                        self.assertIn(edge['from'], loaded)
+                        self.assertIn(edge['to'], loaded)
+                    edges.extend(page['edges'])
+                    cursor = page['next_cursor']
+                self.assertEqual(nodes, result['nodes'])
+                self.assertEqual(sorted(map(repr, edges)), sorted(map(repr, result['edges'])))
+
+    def test_max_nodes(self):
+        for seed, rng, _, lineage_view, start, depth_up, depth_down, result in self.subgraph_cases():
+            with self.subTest(seed=seed):
+                max_nodes = rng.randint(1, max(1, result['total_nodes']))
+                capped = lineage_view.get_dependency_subgraph(start, depth_up, depth_down, max_nodes=max_nodes)
+                self.assertLessEqual(len(capped['nodes']), max_nodes)
+                self.assertEqual(capped['truncated'], result['total_nodes'] > max_nodes)
+
+                # The nearest measures are kept
+                measures = [node for node in result['nodes'] if node.get('type') != 'column']
+                kept = [node for node in capped['nodes'] if node.get('type') != 'column']
+                self.assertEqual(kept, measures[:len(kept)])
+                if len(kept) < len(measures):
+                    self.assertEqual(len(kept), max_nodes)
+                kept_names = {node['id'] for node in capped['nodes']}
+                for edge in capped['edges']:
+                    self.assertIn(edge['from'], kept_names)
+                    self.assertIn(edge['to'], kept_names)
+
+
+class CycleTests(LineageGraphTestCase):
+
+    def test_cycles(self):
+        found = 0
+        for seed, _, lineage, lineage_view in self.random_cases():
+            with self.subTest(seed=seed):
+                components, cyclic = reference_components(lineage)
+                cycles = lineage_view.get_cycles()
+                self.assertEqual({frozenset(cycle) for cycle in cycles},
+                                 {components[name] for name in components if cyclic[name]})
+                self.assertEqual(sum(len(cycle) for cycle in cycles), sum(cyclic.values()))
+                found += len(cycles)
+        self.assertTrue(found)
+
+    def test_self_loop_is_a_cycle(self):
+        lineage_view = self.load({
+            'A': {'parent_measures': ['A'], 'child_measures': ['A'], 'columns': []},
+            'B': {'parent_measures': ['A'], 'child_measures': [], 'columns': []},
+        })
+        self.assertEqual(lineage_view.get_cycles(), [['A']])
+        self.assertEqual(lineage_view.get_measure_levels(), {'A': 0, 'B': 1})
+
+    def test_topological_order(self):
+        for seed, _, lineage, lineage_view in self.random_cases():
+            with self.subTest(seed=seed):
+                components, _ = reference_components(lineage)
+                order = lineage_view.get_topological_order()
+                self.assertEqual(sorted(order), sorted(components))
+                position = {name: index for index, name in enumerate(order)}
+                for name, data in lineage.items():
+                    for parent in data['parent_measures']:
+                        if components[parent] != components[name]:
+                            self.assertLess(position[parent], position[name])
+                # The measures of a cycle are listed together
+                for component in set(components.values()):
+                    slots = sorted(position[name] for name in component)
+                    self.assertEqual(slots[-1] - slots[0], len(slots) - 1)
+
+    def test_levels(self):
+        for seed, _, lineage, lineage_view in self.random_cases(diamond=True):
+            with self.subTest(seed=seed):
+                components, _ = reference_components(lineage)
+                parent_components = {component: set() for component in components.values()}
+                for name, data in lineage.items():
+                    for parent in data['parent_measures']:
+                        if components[parent] != components[name]:
+                            parent_components[components[name]].add(components[parent])
+
+                component_levels = {}
+
+                def level_of(component):
+                    # Longest chain of parent components; the condensation has no cycles
+                    if component not in component_levels:
+                        parents = parent_components[component]
+                        component_levels[component] = 1 + max(map(level_of, parents)) if parents else 0
+                    return component_levels[component]
+
+                self.assertEqual(lineage_view.get_measure_levels(),
+                                 {name: level_of(component) for name, component in components.items()})
+
+
+if __name__ == '__main__':
+    unittest.main()